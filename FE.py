@@ -1,21 +1,56 @@
+import fnmatch
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import pandas as pd
 import streamlit as st
 from parser_core.info_ddl_oop import DDLInfo
+from parser_core.parse_cache import ParseCache
+from parser_core.ddl_records import COLUMN_FIELDS, TABLE_FIELDS
+from parser_core.metrics import MetricsRegistry
 from mainconfig import config
-from mainconfig.datatype_map import SNOWFLAKE_TYPE_MAP
+from mainconfig.log_setup import configure_logging
+from massive_ingest import SNOWFLAKE_FIELDS, ingest_file, init_worker
+from snowflake.snowflake_conf import AVAL_MAP_SNOW
+from snowflake.type_mapping import compile_type_map
 
-def map_to_target_type(source_type: str, source_system: str) -> str:
-    source_system = source_system.lower()
-    source_type = source_type.upper()  # opzionale ma consigliato
 
-    for snowflake_type, system_map in SNOWFLAKE_TYPE_MAP.items():
-        if source_system in system_map:
-            if source_type in system_map[source_system]:
-                return snowflake_type
+st.set_page_config(page_title="DDL Parser Viewer", layout="wide")
 
-    return "UNMAPPED"
 
+@st.cache_resource
+def _setup():
+    # una sola volta per processo: ogni interazione riesegue lo script
+    configure_logging()
+
+
+_setup()
+
+
+# -------------------------
+# CACHE (chiave = hash della DDL normalizzata, come ParseCache)
+# -------------------------
+@st.cache_data(max_entries=256, show_spinner=False)
+def parse_ddl(ddl_hash: str, _ddl_text: str) -> pd.DataFrame:
+    # _ddl_text non entra nella chiave: basta l'hash
+    return DDLInfo(_ddl_text).to_dataframe()
+
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def map_types(ddl_hash: str, _datatypes: pd.Series, source_system: str, target_system: str) -> pd.Series:
+    mapper = compile_type_map(source_system, target_system)
+    return mapper.map_series(_datatypes, default="UNMAPPED")
+
+
+@st.cache_resource
+def _import_pool() -> ProcessPoolExecutor:
+    # pool condiviso tra sessioni e rerun; spawn: il server Streamlit e' multi-thread
+    return ProcessPoolExecutor(config.ingest_workers, mp_context=get_context("spawn"),
+                               initializer=init_worker, initargs=(config.ingest_cache_path,))
 
-st.set_page_config(page_title="DDL Parser Viewer", layout="wide")
 
 st.title("DDL Parser")
 
@@ -26,11 +61,12 @@ ddl_text = st.text_area(
     placeholder="CREATE TABLE ecc ecc..."
 )
 
-if ddl_text.strip():
+df = None
+ddl_hash = ParseCache.key(ddl_text) if ddl_text.strip() else None
+if ddl_hash:
 
     try:
-        # il tuo parser deve restituire un DataFrame
-        df = DDLInfo(ddl_text).to_dataframe()
+        df = parse_ddl(ddl_hash, ddl_text)
 
         st.subheader("DataFrame restituito dal parser")
         st.dataframe(df, use_container_width=True)
@@ -58,18 +94,153 @@ if ddl_text.strip():
             })
 
     except Exception as e:
+        df = None
         st.exception(e)
 else:
     st.info("Incolla una DDL per avviare il parsing")
 
 st.subheader("CONVERSIONE DDL")
-if ddl_text.strip():
-    target_system = st.selectbox(f"Scegli un sistema destinatario", options=config.Aval_opt)
-    source_system = st.selectbox(f"Scegli un sistema sorgente", options=config.Aval_opt)
-    df_modded = df
-    df_modded["SNOWFLAKE_DATA_TYPE"] = df_modded["datatype"].apply(
-        lambda x: map_to_target_type(x, source_system)
-    )
+if df is not None and not df.empty:
+    target_system = st.selectbox("Scegli un sistema destinatario", options=list(AVAL_MAP_SNOW))
+    source_system = st.selectbox("Scegli un sistema sorgente", options=AVAL_MAP_SNOW[target_system])
+    # il cambio di selectbox riusa parsing e mapping gia' calcolati
+    df_modded = df.assign(SNOWFLAKE_DATA_TYPE=map_types(ddl_hash, df["datatype"], source_system, target_system))
     st.dataframe(df_modded, use_container_width=True)
 
-st.header(f"IMPORT_MASSIVO")
\ No newline at end of file
+
+# -------------------------
+# IMPORT MASSIVO
+# -------------------------
+def _stage_uploads(uploads, directory: str) -> dict:
+    """
+    Scrive i file caricati (e il contenuto degli zip) in directory; ritorna
+    {path da parsare: nome mostrato}. Ogni upload ha una sottodirectory
+    propria: file con lo stesso nome (anche dentro zip diversi) non si
+    sovrascrivono.
+    """
+    paths = {}
+    for i, upload in enumerate(uploads):
+        target = os.path.join(directory, str(i))
+        os.mkdir(target)
+        if upload.name.lower().endswith(".zip"):
+            with zipfile.ZipFile(upload) as zf:
+                for member in zf.infolist():
+                    if not member.is_dir() and fnmatch.fnmatch(os.path.basename(member.filename), config.ingest_pattern):
+                        # extract normalizza i path assoluti e i ".." del nome
+                        path = zf.extract(member, target)
+                        paths[path] = f"{upload.name}/{os.path.relpath(path, target)}"
+        else:
+            path = os.path.join(target, os.path.basename(upload.name))
+            with open(path, "wb") as f:
+                f.write(upload.getbuffer())
+            paths[path] = upload.name
+    return dict(sorted(paths.items(), key=lambda item: item[1]))
+
+
+def _release_staging():
+    """Rimuove le directory degli import sostituiti quando i loro worker hanno finito di leggerle."""
+    retired = st.session_state.get("retired_imports", [])
+    for staging, futures in list(retired):
+        if all(future.done() for future in futures):
+            staging.cleanup()
+            retired.remove((staging, futures))
+
+
+def _start_import(uploads, source_db):
+    previous = st.session_state.get("import_job")
+    if previous is not None:
+        # un nuovo import sostituisce il precedente: i file non ancora avviati vengono annullati,
+        # quelli in corso leggono ancora dalla directory di staging
+        for future in previous['futures']:
+            future.cancel()
+        if previous['staging'] is not None:
+            st.session_state.setdefault("retired_imports", []).append((previous['staging'], previous['futures']))
+    _release_staging()
+    staging = tempfile.TemporaryDirectory(prefix="ddl_import_")
+    paths = _stage_uploads(uploads, staging.name)
+    pool = _import_pool()
+    st.session_state["import_job"] = {
+        'staging': staging,
+        'source_db': source_db,
+        'labels': paths,
+        'futures': [pool.submit(ingest_file, path, source_db) for path in paths],
+        'collected': 0,
+        'tables': 0,
+        'rows': [],
+        'errors': [],
+        'metrics': MetricsRegistry(),
+        'result': None,
+        'errors_frame': None,
+        'csv': None,
+    }
+
+
+def _collect(job: dict):
+    """Raccoglie in ordine i risultati dei file gia' completati (risultati incrementali)."""
+    futures = job['futures']
+    collected = job['collected']
+    while job['collected'] < len(futures) and futures[job['collected']].done():
+        future = futures[job['collected']]
+        job['collected'] += 1
+        try:
+            path, tables, errors, _, metrics = future.result()
+        except Exception as e:
+            job['errors'].append(("?", 0, f"{type(e).__name__}: {e}"))
+            continue
+        rel = job['labels'][path]
+        job['tables'] += len(tables)
+        for identity, columns in tables:
+            job['rows'].extend((rel,) + identity + tuple(c) for c in columns)
+        job['errors'].extend((rel, line, message) for line, message in errors)
+        job['metrics'].merge(metrics)
+    if job['collected'] == collected and job['result'] is not None:
+        return
+    # DataFrame ricostruiti solo quando arrivano nuovi file, non a ogni rerun del frammento
+    header = ('source_file',) + TABLE_FIELDS + COLUMN_FIELDS + (SNOWFLAKE_FIELDS if job['source_db'] else ())
+    job['result'] = pd.DataFrame.from_records(job['rows'], columns=list(header))
+    job['errors_frame'] = pd.DataFrame(job['errors'], columns=['source_file', 'line', 'error'])
+    if job['collected'] == len(futures):
+        # CSV codificato una volta a fine import
+        job['csv'] = job['result'].to_csv(index=False).encode("utf-8")
+        job['staging'].cleanup()
+        job['staging'] = None
+
+
+def _import_running() -> bool:
+    job = st.session_state.get("import_job")
+    return (job is not None and job['staging'] is not None) or bool(st.session_state.get("retired_imports"))
+
+
+def _import_progress():
+    # rieseguito solo questo frammento: il resto della pagina resta interattivo
+    running = _import_running()
+    _release_staging()
+    job = st.session_state.get("import_job")
+    if job is not None:
+        if job['staging'] is not None:
+            _collect(job)
+        total = len(job['futures'])
+        done = job['collected']
+        st.progress(done / total if total else 1.0, text=f"{done}/{total} file elaborati")
+        st.write({"tabelle": job['tables'], "colonne": len(job['result']), "errori": len(job['errors'])})
+        st.dataframe(job['result'], use_container_width=True)
+        if job['errors']:
+            st.dataframe(job['errors_frame'], use_container_width=True)
+        if job['csv'] is not None:
+            st.download_button("Scarica CSV", job['csv'], file_name=config.ingest_output_filename, mime="text/csv")
+            with st.expander("Metriche"):
+                st.json(job['metrics'].summary())
+    if running and not _import_running():
+        # import concluso: rerun della pagina per registrare il frammento senza run_every
+        st.rerun()
+
+
+st.header(f"IMPORT_MASSIVO")
+uploads = st.file_uploader("Carica file DDL o archivi zip", type=["sql", "zip"], accept_multiple_files=True)
+bulk_source = st.selectbox("Sistema sorgente (conversione Snowflake opzionale)",
+                           options=[None] + AVAL_MAP_SNOW["snowflake"],
+                           format_func=lambda v: "nessuna conversione" if v is None else v)
+if st.button("Avvia import", disabled=not uploads):
+    _start_import(uploads, bulk_source)
+# aggiornamento automatico solo mentre ci sono file in elaborazione
+st.fragment(_import_progress, run_every=1.0 if _import_running() else None)()
@@ -0,0 +1,151 @@
+"""
+Sviluppatore: Antonio Nunziante
+Generatore deterministico (seed) di DDL sintetiche per i benchmark.
+
+Copre i casi che hanno causato regressioni: tabelle strette e molto larghe
+(10 - 10.000 colonne), molte constraint, parentesi annidate in DEFAULT e
+CHECK, tutti gli stili di quoting (nessuno, "", ``, []), commenti e dump
+multi-istruzione con istruzioni non CREATE TABLE intercalate.
+
+Uso:
+    python -m benchmarks.corpus --tables 1000 --columns 10 --out dump.sql
+"""
+
+import argparse
+import random
+from typing import NamedTuple
+
+_QUOTES = (
+    lambda n: n,
+    lambda n: f'"{n}"',
+    lambda n: f"`{n}`",
+    lambda n: f"[{n}]",
+)
+
+# (tipo, generatore della parte tra parentesi o None)
+_TYPES = (
+    ("INT", None),
+    ("BIGINT", None),
+    ("BIT", None),
+    ("DATE", None),
+    ("TEXT", None),
+    ("DOUBLE PRECISION", None),
+    ("VARCHAR", lambda r: str(r.randint(1, 4000))),
+    ("NVARCHAR", lambda r: str(r.randint(1, 4000))),
+    ("CHAR", lambda r: str(r.randint(1, 64))),
+    ("VARCHAR2", lambda r: f"{r.randint(1, 4000)} CHAR"),
+    ("DECIMAL", lambda r: f"{r.randint(1, 38)},{r.randint(0, 10)}"),
+    ("NUMBER", lambda r: f"{r.randint(1, 38)}, {r.randint(0, 10)}"),
+    ("DATETIME2", lambda r: str(r.randint(0, 7))),
+)
+
+_DEFAULTS = (
+    "DEFAULT 0",
+    "DEFAULT (1)",
+    "DEFAULT ((0))",
+    "DEFAULT (COALESCE((1), (2)))",
+    "DEFAULT (SYSDATETIME())",
+    "DEFAULT 'a, (b'",
+    "DEFAULT 'it''s'",
+)
+
+
+class SyntheticTable(NamedTuple):
+    ddl: str
+    name: str               # nome qualificato come atteso dal parser (senza quote)
+    n_columns: int
+
+
+def _column(rng: random.Random, name: str, quote) -> str:
+    type_name, length = rng.choice(_TYPES)
+    parts = [quote(name), f"{type_name}({length(rng)})" if length else type_name]
+    if type_name == "DATETIME2" and rng.random() < 0.2:
+        parts[-1] = "TIMESTAMP(6) WITH TIME ZONE"
+    roll = rng.random()
+    if roll < 0.3:
+        parts.append("NOT NULL")
+    elif roll < 0.4:
+        parts.append("NULL")
+    if rng.random() < 0.3:
+        parts.append(rng.choice(_DEFAULTS))
+    if rng.random() < 0.1:
+        parts.append(f"CHECK (({quote(name)} >= (0)) AND ({quote(name)} < (10 * (2 + 3))))")
+    if rng.random() < 0.05:
+        parts.append("/* nota, con (parentesi) */")
+    return " ".join(parts)
+
+
+def generate_table(seed: int, n_columns: int, index: int = 0, constraints: int = None) -> SyntheticTable:
+    """
+    Una CREATE TABLE con n_columns colonne. constraints e' il numero di
+    constraint a livello tabella (default: una ogni 50 colonne, minimo 1).
+    """
+    rng = random.Random(f"{seed}:{n_columns}:{index}")
+    quote = rng.choice(_QUOTES)
+    database, schema, table = f"db{index % 3}", f"sch{index % 7}", f"tab_{n_columns}_{index}"
+    names = [f"col_{i}" for i in range(n_columns)]
+    items = [_column(rng, name, rng.choice(_QUOTES)) for name in names]
+    if rng.random() < 0.3:
+        at = rng.randrange(n_columns)
+        items[at] = "-- commento, (non una colonna)\n    " + items[at]
+    if constraints is None:
+        constraints = max(1, n_columns // 50)
+    pk_width = min(3, n_columns)
+    defs = [f"CONSTRAINT {quote('pk_' + table)} PRIMARY KEY ({', '.join(quote(n) for n in names[:pk_width])})"]
+    for i in range(1, constraints):
+        col = names[rng.randrange(n_columns)]
+        kind = i % 3
+        if kind == 0:
+            defs.append(f"CONSTRAINT fk_{table}_{i} FOREIGN KEY ({quote(col)}) "
+                        f"REFERENCES {quote(schema)}.{quote('ref_' + str(i))} ({quote('id')})")
+        elif kind == 1:
+            defs.append(f"CONSTRAINT uq_{table}_{i} UNIQUE ({quote(col)}, {quote(names[0])})")
+        else:
+            defs.append(f"CONSTRAINT ck_{table}_{i} CHECK ({quote(col)} IN ('a', 'b,c', '(d)'))")
+    qualified = ".".join(quote(p) for p in (database, schema, table))
+    body = ",\n    ".join(items + defs)
+    ddl = f"CREATE TABLE {qualified} (\n    {body}\n);"
+    return SyntheticTable(ddl, f"{database}.{schema}.{table}", n_columns)
+
+
+def generate_tables(seed: int, n_tables: int, n_columns) -> list:
+    """n_tables tabelle; n_columns e' un intero o una coppia (min, max) estratta per tabella."""
+    rng = random.Random(seed)
+    tables = []
+    for index in range(n_tables):
+        width = n_columns if isinstance(n_columns, int) else rng.randint(*n_columns)
+        tables.append(generate_table(seed, width, index))
+    return tables
+
+
+def generate_dump(seed: int, n_tables: int, n_columns=(10, 200)) -> str:
+    """Dump multi-istruzione: CREATE TABLE intervallate da INSERT, CREATE INDEX e batch GO."""
+    rng = random.Random(f"dump:{seed}")
+    chunks = []
+    for table in generate_tables(seed, n_tables, n_columns):
+        chunks.append(table.ddl)
+        roll = rng.random()
+        if roll < 0.2:
+            chunks.append(f"INSERT INTO {table.name} VALUES (1, 'x;y', '(z');")
+        elif roll < 0.3:
+            chunks.append(f"CREATE INDEX ix_{rng.randrange(10 ** 6)} ON {table.name} (col_0);")
+        elif roll < 0.35:
+            chunks.append("GO")
+    return "\n\n".join(chunks) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un dump DDL sintetico")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tables", type=int, default=1000)
+    parser.add_argument("--columns", type=int, nargs="+", default=[10, 200],
+                        help="numero di colonne fisso oppure intervallo min max")
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args(argv)
+    n_columns = args.columns[0] if len(args.columns) == 1 else tuple(args.columns[:2])
+    with open(args.out, "w", encoding="utf-8") as f:
+        f.write(generate_dump(args.seed, args.tables, n_columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Sviluppatore: Antonio Nunziante
+Harness di benchmark del parser.
+
+Per ogni target (DDLInfo, info_ddl.get_columns_info, SnowflakeExtend,
+to_dataframe) e per ogni larghezza di tabella (10 - 10.000 colonne) misura
+throughput (tabelle/s, colonne/s) e picco di memoria (tracemalloc, in un
+passaggio separato per non falsare i tempi). Il numero totale di colonne
+per workload e' costante: a parita' di lavoro, un tempo per colonna che
+cresce con la larghezza indica un comportamento super-lineare.
+
+I risultati sono confrontati con una baseline JSON (benchmarks/baseline.json);
+il processo termina con codice 1 se un target regredisce oltre la tolleranza
+o non e' lineare, o se l'import del core supera il budget
+(benchmarks/import_budget.py).
+
+Uso:
+    python -m benchmarks.harness [--quick] [--targets ddlinfo snowflake]
+    python -m benchmarks.harness --update-baseline
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from benchmarks.corpus import generate_tables
+from benchmarks.import_budget import IMPORT_BUDGET_MS, check_imports, format_report as format_import_report
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+WIDTHS = (10, 100, 1000, 10000)
+TOTAL_COLUMNS = 20000
+QUICK_TOTAL_COLUMNS = 4000
+
+
+def _ddlinfo(ddl):
+    from parser_core.info_ddl_oop import DDLInfo
+    return len(DDLInfo(ddl).table_meta.columns)
+
+
+def _info_ddl(ddl):
+    import info_ddl
+    return len(info_ddl.get_columns_info(ddl, out='records').columns)
+
+
+def _snowflake(ddl):
+    from snowflake.Snowflake_extension_engine import SnowflakeExtend
+    return len(SnowflakeExtend(ddl, "sql_server").dataframe_snw.index)
+
+
+def _to_dataframe(ddl):
+    from parser_core.info_ddl_oop import DDLInfo
+    return len(DDLInfo(ddl).to_dataframe().index)
+
+
+# nome -> (funzione su una DDL che ritorna il numero di colonne, il conteggio deve essere esatto)
+TARGETS = {
+    'ddlinfo': (_ddlinfo, True),
+    'info_ddl': (_info_ddl, False),     # parser legacy: il conteggio e' solo informativo
+    'snowflake': (_snowflake, True),
+    'to_dataframe': (_to_dataframe, True),
+}
+
+
+def build_workloads(seed: int = 42, widths=WIDTHS, total_columns: int = TOTAL_COLUMNS) -> dict:
+    """larghezza -> lista di SyntheticTable, con circa total_columns colonne per workload."""
+    return {w: generate_tables(seed, max(1, total_columns // w), w) for w in widths}
+
+
+def _run(func, tables) -> int:
+    return sum(func(t.ddl) for t in tables)
+
+
+def measure(func, tables, repeat: int = 3) -> dict:
+    """Miglior tempo su repeat esecuzioni e picco di memoria di un'esecuzione."""
+    _run(func, tables[:1])      # warm-up: import e cache di modulo
+    best = float('inf')
+    parsed = 0
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        parsed = _run(func, tables)
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    _run(func, tables)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    n_tables = len(tables)
+    n_columns = sum(t.n_columns for t in tables)
+    return {
+        'tables': n_tables,
+        'columns': n_columns,
+        'parsed_columns': parsed,
+        'seconds': round(best, 6),
+        'tables_per_s': round(n_tables / best, 1),
+        'columns_per_s': round(n_columns / best, 1),
+        'us_per_column': round(best / n_columns * 1e6, 3),
+        'peak_mb': round(peak / 2 ** 20, 3),
+    }
+
+
+def run_benchmarks(targets=None, widths=WIDTHS, total_columns: int = TOTAL_COLUMNS, seed: int = 42,
+                   repeat: int = 3) -> dict:
+    """target -> larghezza (stringa, per il JSON) -> metriche."""
+    workloads = build_workloads(seed, widths, total_columns)
+    results = {}
+    for name in targets or TARGETS:
+        func, _ = TARGETS[name]
+        results[name] = {str(w): measure(func, workloads[w], repeat) for w in widths}
+    return results
+
+
+def check(results: dict, baseline: dict = None, tolerance: float = 0.3, max_growth: float = 3.0) -> list:
+    """
+    Problemi rilevati:
+    - conteggio colonne errato (per i target con conteggio esatto);
+    - tempo per colonna alla larghezza massima oltre max_growth volte quello
+      alla larghezza minima (super-linearita');
+    - colonne/s sotto la baseline di oltre la tolleranza.
+    """
+    problems = []
+    for name, by_width in results.items():
+        exact = TARGETS[name][1]
+        for width, m in by_width.items():
+            if exact and m['parsed_columns'] != m['columns']:
+                problems.append(f"{name}[{width}]: {m['parsed_columns']} colonne su {m['columns']}")
+        widths = sorted(by_width, key=int)
+        if len(widths) > 1:
+            growth = by_width[widths[-1]]['us_per_column'] / by_width[widths[0]]['us_per_column']
+            if growth > max_growth:
+                problems.append(f"{name}: tempo per colonna x{growth:.1f} da {widths[0]} a {widths[-1]} colonne")
+        for width, m in by_width.items():
+            reference = ((baseline or {}).get(name) or {}).get(width)
+            if reference and m['columns_per_s'] < reference['columns_per_s'] * (1 - tolerance):
+                problems.append(
+                    f"{name}[{width}]: {m['columns_per_s']:.0f} colonne/s contro {reference['columns_per_s']:.0f} in baseline")
+    return problems
+
+
+def format_report(results: dict, baseline: dict = None) -> str:
+    lines = [f"{'target':<14}{'colonne':>8}{'tabelle/s':>12}{'colonne/s':>12}{'us/col':>9}{'peak MB':>9}{'vs base':>9}"]
+    for name, by_width in results.items():
+        for width, m in by_width.items():
+            reference = ((baseline or {}).get(name) or {}).get(width)
+            ratio = f"{m['columns_per_s'] / reference['columns_per_s']:.2f}x" if reference else "-"
+            lines.append(f"{name:<14}{width:>8}{m['tables_per_s']:>12.1f}{m['columns_per_s']:>12.0f}"
+                         f"{m['us_per_column']:>9.2f}{m['peak_mb']:>9.2f}{ratio:>9}")
+    return "\n".join(lines)
+
+
+def load_baseline(path: str = BASELINE_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del parser DDL")
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument("--widths", nargs="+", type=int, default=list(WIDTHS))
+    parser.add_argument("--quick", action="store_true", help=f"{QUICK_TOTAL_COLUMNS} colonne per workload, 1 ripetizione")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--json", help="scrive i risultati completi in questo file")
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--skip-imports", action="store_true", help="salta il controllo sul tempo di import")
+    args = parser.parse_args(argv)
+
+    import_problems = []
+    if not args.skip_imports:
+        import_results, import_problems = check_imports(budget_ms=args.import_budget_ms)
+        print(format_import_report(import_results))
+        print()
+
+    total = QUICK_TOTAL_COLUMNS if args.quick else TOTAL_COLUMNS
+    results = run_benchmarks(args.targets, args.widths, total, args.seed, repeat=1 if args.quick else 3)
+    baseline = load_baseline(args.baseline)
+    print(format_report(results, baseline))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"baseline aggiornata: {args.baseline}")
+        return 0
+    problems = import_problems + check(results, baseline, args.tolerance)
+    for problem in problems:
+        print(f"REGRESSIONE: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Sviluppatore: Antonio Nunziante
+Budget sul tempo di import del parser.
+
+Ogni modulo viene importato in un processo Python pulito, con cartella di
+lavoro temporanea vuota, e si verifica che:
+- il tempo di import resti sotto il budget (miglior tempo su N processi);
+- non vengano caricate dipendenze pesanti (pandas, numpy, IPython, pyarrow);
+- l'import non abbia effetti collaterali: nessun file o cartella creati,
+  nessun handler aggiunto al root logger.
+
+Uso:
+    python -m benchmarks.import_budget [--budget-ms 150]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CORE_MODULES = (
+    'parser_core.ddl_lexer',
+    'parser_core.ddl_records',
+    'parser_core.metrics',
+    'parser_core.info_ddl_oop',
+    'parser_core.ddl_stream',
+    'parser_core.ddl_index',
+    'parser_core.ddl_templates',
+    'parser_core.bounded_parse',
+    'parser_core.parse_cache',
+    'parser_core.catalog',
+    'parser_core.ddl_idents',
+    'parser_core.schema_diff',
+    'parser_core.ddl_arrow',
+    'parser_core.__main__',
+    'parse_service.client',
+    'info_ddl',
+)
+HEAVY_MODULES = ('pandas', 'numpy', 'IPython', 'pyarrow')
+IMPORT_BUDGET_MS = 150
+
+_PROBE = """
+import json, logging, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'ms': elapsed * 1000,
+    'heavy': [m for m in {heavy!r} if m in sys.modules],
+    'handlers': len(logging.getLogger().handlers),
+}}))
+"""
+
+
+def probe(module: str, repeat: int = 3) -> dict:
+    """Import di module in processi puliti: miglior tempo ed effetti collaterali osservati."""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, PYTHONDONTWRITEBYTECODE="1")
+    best = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as cwd:
+            out = subprocess.run(
+                [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                cwd=cwd, env=env, capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            result['created'] = sorted(os.listdir(cwd))
+        if best is None or result['ms'] < best['ms']:
+            best = result
+    best['ms'] = round(best['ms'], 1)
+    return best
+
+
+def check_imports(modules=CORE_MODULES, budget_ms: float = IMPORT_BUDGET_MS, repeat: int = 3):
+    """Ritorna (risultati per modulo, lista dei problemi)."""
+    results = {}
+    problems = []
+    for module in modules:
+        r = results[module] = probe(module, repeat)
+        if r['ms'] > budget_ms:
+            problems.append(f"{module}: import in {r['ms']} ms (budget {budget_ms} ms)")
+        if r['heavy']:
+            problems.append(f"{module}: importa {', '.join(r['heavy'])}")
+        if r['created']:
+            problems.append(f"{module}: crea {', '.join(r['created'])} all'import")
+        if r['handlers']:
+            problems.append(f"{module}: configura il logging all'import")
+    return results, problems
+
+
+def format_report(results: dict) -> str:
+    lines = [f"{'modulo':<38}{'ms':>8}  dipendenze pesanti"]
+    for module, r in results.items():
+        lines.append(f"{module:<38}{r['ms']:>8.1f}  {', '.join(r['heavy']) or '-'}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Budget sul tempo di import del parser")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("modules", nargs="*", default=list(CORE_MODULES))
+    args = parser.parse_args(argv)
+    results, problems = check_imports(args.modules, args.budget_ms, args.repeat)
+    print(format_report(results))
+    for problem in problems:
+        print(f"REGRESSIONE: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+"""
+Sviluppatore: Antonio Nunziante
+Analisi delle DDL lente di un corpus: costo per istruzione e per fase.
+
+Ogni CREATE TABLE dei file in input viene parsata come DDLInfo (e, con
+--source-db, convertita come SnowflakeExtend.dataframe_snw) fase per fase:
+- scan: lexer a passata singola (blocco colonne, definizioni, PK, FK)
+- row_build: costruzione del TableMeta
+- dataframe_build: DataFrame della tabella (solo con --source-db)
+- transform: pipeline Snowflake (solo con --source-db)
+
+Per ogni istruzione sono registrati il tempo migliore su --repeat
+esecuzioni e, in un'esecuzione separata con tracemalloc (per non falsare
+i tempi), il picco di memoria allocata per fase. Le istruzioni piu' costose
+sono ordinate con le caratteristiche strutturali che ne spiegano il costo
+(colonne, definizione piu' lunga, profondita' delle parentesi, CHECK,
+DEFAULT, ...) confrontate con la mediana del corpus.
+
+--profile esegue una singola istruzione (posizione nella classifica o
+file:riga) sotto cProfile e salva un file .prof (pstats), leggibile con
+snakeviz, gprof2dot o flameprof per il flamegraph.
+
+Uso:
+    python -m benchmarks.slow_ddl dump.sql ./ddl_dir [--source-db sql_server] [--top 20]
+    python -m benchmarks.slow_ddl dump.sql --profile 1 --profile-out outlier.prof
+"""
+
+import argparse
+import cProfile
+import csv
+import logging
+import pstats
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+from typing import NamedTuple
+
+from mainconfig import config
+from parser_core.ddl_stream import iter_statements
+from parser_core.info_ddl_oop import DDLInfo
+
+FEATURES = ('chars', 'definitions', 'columns', 'primary_keys', 'foreign_keys', 'max_definition_chars',
+            'paren_depth', 'checks', 'defaults', 'comments', 'quotes')
+# una caratteristica spiega il costo se supera di questo fattore la mediana del corpus
+EXPLAIN_FACTOR = 10.0
+
+_PARENS = re.compile(r"[()]")
+_CHECK = re.compile(r"\bCHECK\b", re.IGNORECASE)
+_DEFAULT = re.compile(r"\bDEFAULT\b", re.IGNORECASE)
+_COMMENT = re.compile(r"--|/\*")
+_QUOTE = re.compile(r"['\"`\[]")
+
+
+class StatementCost(NamedTuple):
+    source: str
+    line: int
+    table: str
+    status: str                 # ok / error
+    message: str
+    seconds: float              # somma delle fasi (miglior tempo per fase)
+    phases: dict                # fase -> secondi
+    alloc_bytes: int            # picco di memoria allocata dall'istruzione
+    alloc_phases: dict          # fase -> picco di memoria allocata nella fase
+    features: dict
+
+    @property
+    def location(self) -> str:
+        return f"{self.source}:{self.line}"
+
+
+def _paren_depth(text: str) -> int:
+    depth = deepest = 0
+    for paren in _PARENS.findall(text):
+        if paren == "(":
+            depth += 1
+            if depth > deepest:
+                deepest = depth
+        elif depth:
+            depth -= 1
+    return deepest
+
+
+def structural_features(text: str, parsed: DDLInfo = None) -> dict:
+    """Caratteristiche strutturali dell'istruzione (quelle del parsing solo se parsed e' disponibile)."""
+    features = {
+        'chars': len(text),
+        'paren_depth': _paren_depth(text),
+        'checks': len(_CHECK.findall(text)),
+        'defaults': len(_DEFAULT.findall(text)),
+        'comments': len(_COMMENT.findall(text)),
+        'quotes': len(_QUOTE.findall(text)),
+    }
+    scan = parsed.__dict__.get('_scan') if parsed is not None else None
+    if scan is not None:
+        features.update({
+            'definitions': len(scan.column_defs),
+            'columns': len(scan.columns),
+            'primary_keys': len(scan.primary_keys),
+            'foreign_keys': len(scan.foreign_keys),
+            'max_definition_chars': max(map(len, scan.column_defs), default=0),
+        })
+    return {name: features.get(name, 0) for name in FEATURES}
+
+
+def _phases(text: str, source_db: str = None):
+    """(fase, funzione) in ordine: le funzioni condividono l'istanza come nel parsing normale."""
+    parsed = DDLInfo(text)
+    steps = [('scan', lambda: parsed._scan), ('row_build', lambda: parsed.table_meta)]
+    if source_db:
+        # stesse operazioni di SnowflakeExtend.dataframe_snw, separate per fase
+        from snowflake.Snowflake_extension_engine import snowflake_transform
+        frame = {}
+
+        def dataframe_build():
+            if not parsed.table_meta.columns:
+                raise ValueError("DataFrame vuoto: impossibile inizializzare SnowflakeExtend")
+            frame['df'] = parsed.to_dataframe()
+
+        steps += [('dataframe_build', dataframe_build),
+                  ('transform', lambda: snowflake_transform(frame['df'], source_db))]
+    return parsed, steps
+
+
+def _time_statement(text: str, source_db: str, repeat: int):
+    """
+    Miglior tempo per fase su repeat esecuzioni (istanza nuova a ogni
+    esecuzione). Se una fase fallisce ritorna i tempi fino all'errore
+    compreso: anche un fallimento lento e' un costo da trovare.
+    """
+    best = {}
+    parsed = None
+    for _ in range(repeat):
+        parsed, steps = _phases(text, source_db)
+        for phase, step in steps:
+            start = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                best[phase] = min(best.get(phase, float('inf')), time.perf_counter() - start)
+                return parsed, best, f"{type(e).__name__}: {e}"
+            seconds = time.perf_counter() - start
+            if seconds < best.get(phase, float('inf')):
+                best[phase] = seconds
+    return parsed, best, ""
+
+
+def _alloc_statement(text: str, source_db: str):
+    """Picco di memoria allocata per fase (tracemalloc attivo) e per l'intera istruzione."""
+    base = tracemalloc.get_traced_memory()[0]
+    peak_total = 0
+    alloc = {}
+    _, steps = _phases(text, source_db)
+    for phase, step in steps:
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        try:
+            step()
+        finally:
+            peak = tracemalloc.get_traced_memory()[1]
+            alloc[phase] = max(0, peak - start)
+            peak_total = max(peak_total, peak - base)
+    return peak_total, alloc
+
+
+def iter_sources(paths, pattern: str = None):
+    """File in input: i path di directory sono espansi con config.ingest_pattern."""
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob(pattern or config.ingest_pattern) if p.is_file())
+        else:
+            yield path
+
+
+def analyze(paths, source_db: str = None, repeat: int = 3, allocations: bool = True, pattern: str = None) -> list:
+    """StatementCost per ogni CREATE TABLE dei file in input, nell'ordine del corpus."""
+    costs = []
+    for path in iter_sources(paths, pattern):
+        for statement in iter_statements(str(path)):
+            parsed, phases, error = _time_statement(statement.text, source_db, repeat)
+            if error:
+                costs.append(StatementCost(str(path), statement.line, "", "error", error, sum(phases.values()),
+                                           phases, 0, {}, structural_features(statement.text, parsed)))
+                continue
+            alloc_bytes, alloc_phases = 0, {}
+            if allocations:
+                # tracemalloc attivo solo qui: rallenta il parsing, i tempi restano quelli misurati senza
+                tracemalloc.start()
+                try:
+                    alloc_bytes, alloc_phases = _alloc_statement(statement.text, source_db)
+                finally:
+                    tracemalloc.stop()
+            costs.append(StatementCost(str(path), statement.line, parsed.table_meta.fully_qualified_table, "ok", "",
+                                       sum(phases.values()), phases, alloc_bytes, alloc_phases,
+                                       structural_features(statement.text, parsed)))
+    return costs
+
+
+def _statement_text(source: str, line: int) -> str:
+    for statement in iter_statements(source):
+        if statement.line == line:
+            return statement.text
+    raise ValueError(f"istruzione {source}:{line} non trovata")
+
+
+def rank(costs: list, top: int = 20, by: str = 'seconds') -> list:
+    key = (lambda c: c.alloc_bytes) if by == 'alloc' else (lambda c: c.seconds)
+    return sorted(costs, key=key, reverse=True)[:top]
+
+
+def corpus_medians(costs: list) -> dict:
+    ok = [c for c in costs if c.status == "ok"] or costs
+    medians = {name: statistics.median(c.features[name] for c in ok) for name in FEATURES} if ok else {}
+    per_char = [c.seconds / c.features['chars'] for c in ok if c.features['chars']]
+    medians['seconds_per_char'] = statistics.median(per_char) if per_char else 0.0
+    return medians
+
+
+def explain(cost: StatementCost, medians: dict, factor: float = EXPLAIN_FACTOR) -> list:
+    """Caratteristiche oltre factor volte la mediana del corpus, fase dominante e costo per carattere."""
+    reasons = []
+    for name in FEATURES:
+        value = cost.features[name]
+        median = medians.get(name, 0)
+        if value and value >= factor * max(median, 1):
+            reasons.append(f"{name}={value} (x{value / max(median, 1):.0f} mediana)")
+    if cost.phases and cost.seconds:
+        phase, seconds = max(cost.phases.items(), key=lambda item: item[1])
+        reasons.append(f"fase {phase} {seconds / cost.seconds:.0%}")
+    chars = cost.features['chars']
+    per_char = medians.get('seconds_per_char')
+    if chars and per_char and cost.seconds / chars >= 3 * per_char:
+        # costo per carattere anomalo: la dimensione da sola non spiega il tempo
+        reasons.append(f"tempo per carattere x{cost.seconds / chars / per_char:.1f} mediana")
+    return reasons
+
+
+def format_report(costs: list, top: int = 20, by: str = 'seconds') -> str:
+    if not costs:
+        return "nessuna CREATE TABLE trovata"
+    medians = corpus_medians(costs)
+    total = sum(c.seconds for c in costs)
+    phases = {}
+    for cost in costs:
+        for phase, seconds in cost.phases.items():
+            phases[phase] = phases.get(phase, 0.0) + seconds
+    errors = sum(c.status != "ok" for c in costs)
+    lines = [
+        f"istruzioni: {len(costs)}  errori: {errors}  tempo totale: {total * 1000:.1f} ms",
+        "fasi: " + ", ".join(f"{p} {s * 1000:.1f} ms ({s / total:.0%})" for p, s in phases.items() if total),
+        "",
+        f"{'#':>3} {'ms':>9} {'quota':>6} {'alloc KB':>9}  {'tabella':<40} posizione",
+    ]
+    for i, cost in enumerate(rank(costs, top, by), 1):
+        share = cost.seconds / total if total else 0.0
+        lines.append(f"{i:>3} {cost.seconds * 1000:>9.2f} {share:>6.1%} {cost.alloc_bytes / 1024:>9.1f}  "
+                     f"{cost.table or '-':<40} {cost.location}")
+        if cost.status != "ok":
+            lines.append(f"{'':>5}errore: {cost.message}")
+        reasons = explain(cost, medians)
+        if reasons:
+            lines.append(f"{'':>5}" + "; ".join(reasons))
+    return "\n".join(lines)
+
+
+def write_csv(costs: list, path: str):
+    """Una riga per istruzione: tempi e allocazioni per fase, caratteristiche strutturali."""
+    phases = list(dict.fromkeys(p for c in costs for p in c.phases))
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(['source', 'line', 'table', 'status', 'message', 'seconds', 'alloc_bytes']
+                        + [f"{p}_seconds" for p in phases] + [f"{p}_alloc_bytes" for p in phases] + list(FEATURES))
+        for c in costs:
+            writer.writerow([c.source, c.line, c.table, c.status, c.message, round(c.seconds, 9), c.alloc_bytes]
+                            + [round(c.phases.get(p, 0.0), 9) for p in phases]
+                            + [c.alloc_phases.get(p, 0) for p in phases]
+                            + [c.features[name] for name in FEATURES])
+
+
+def _resolve_target(target: str, costs: list, by: str = 'seconds') -> StatementCost:
+    """Posizione nella classifica (1 = piu' costosa) oppure file:riga."""
+    if target.isdigit():
+        ranked = rank(costs, len(costs), by)
+        index = int(target) - 1
+        if not 0 <= index < len(ranked):
+            raise ValueError(f"posizione {target} fuori dalla classifica ({len(ranked)} istruzioni)")
+        return ranked[index]
+    for cost in costs:
+        if cost.location == target or cost.location.endswith(target):
+            return cost
+    raise ValueError(f"istruzione {target} non trovata")
+
+
+def profile_statement(cost: StatementCost, out_path: str, source_db: str = None, repeat: int = 5,
+                      limit: int = 15) -> str:
+    """Esegue l'istruzione sotto cProfile, salva il .prof e ritorna le funzioni piu' costose."""
+    text = _statement_text(cost.source, cost.line)
+    profiler = cProfile.Profile()
+    for _ in range(repeat):
+        _, steps = _phases(text, source_db)
+        profiler.enable()
+        try:
+            for _, step in steps:
+                step()
+        except Exception:
+            # anche il percorso di errore e' un costo da profilare
+            pass
+        finally:
+            profiler.disable()
+    profiler.dump_stats(out_path)
+    buffer = StringIO()
+    pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(limit)
+    return buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Costo per istruzione e per fase delle DDL di un corpus")
+    parser.add_argument("paths", nargs="+", help="file DDL o directory (config.ingest_pattern)")
+    parser.add_argument("--source-db", default=None, help="misura anche la conversione Snowflake (es. sql_server)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--by", choices=("seconds", "alloc"), default="seconds", help="ordinamento della classifica")
+    parser.add_argument("--repeat", type=int, default=3, help="esecuzioni per istruzione (miglior tempo)")
+    parser.add_argument("--no-alloc", action="store_true", help="salta il passaggio con tracemalloc")
+    parser.add_argument("--csv", metavar="PATH", help="una riga per istruzione con tempi, allocazioni e caratteristiche")
+    parser.add_argument("--profile", metavar="TARGET",
+                        help="profila un'istruzione: posizione in classifica (1 = piu' costosa) o file:riga")
+    parser.add_argument("--profile-out", default="slow_ddl.prof", help="file pstats per snakeviz/flameprof")
+    args = parser.parse_args(argv)
+    # gli input patologici generano errori attesi nel log del parser: nessun output sul terminale
+    logging.getLogger("info_DDL_oop").addHandler(logging.NullHandler())
+    if args.no_alloc and args.by == 'alloc':
+        parser.error("--by alloc richiede il passaggio con tracemalloc")
+    costs = analyze(args.paths, args.source_db, args.repeat, not args.no_alloc)
+    print(format_report(costs, args.top, args.by))
+    if args.csv:
+        write_csv(costs, args.csv)
+    if args.profile:
+        try:
+            target = _resolve_target(args.profile, costs, args.by)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"\nprofilo di {target.location} ({target.table or '-'}) -> {args.profile_out}")
+        print(profile_statement(target, args.profile_out, args.source_db))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
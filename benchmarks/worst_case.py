@@ -0,0 +1,230 @@
+"""
+Sviluppatore: Antonio Nunziante
+Corpus di casi peggiori per il parser e verifica di linearita'.
+
+Ogni famiglia genera, per una dimensione in caratteri, una DDL costruita
+per stressare un punto del lexer o dello splitter: quote e commenti non
+chiusi, parentesi profonde o non bilanciate, CHECK giganti, intestazioni
+degeneri, separatori ripetuti. La famiglia "fuzz" applica mutazioni
+casuali (seed fisso) a tabelle del corpus sintetico.
+
+Per ogni famiglia il tempo di parsing e' misurato a dimensioni crescenti
+(ciascuna 4 volte la precedente): tra due dimensioni consecutive il tempo
+per carattere non deve crescere oltre --max-growth volte. Un comportamento
+quadratico cresce di 4 volte a ogni passo; un singolo salto moderato e'
+tipico delle cache della CPU quando l'input smette di starci. Ogni input deve inoltre
+produrre un ParseResult (nessuna eccezione) e un budget di tempo minimo
+deve interrompere l'input piu' grande con esito timeout.
+
+Uso:
+    python -m benchmarks.worst_case [--sizes 65536 262144 1048576] [--families fuzz deep_parens]
+"""
+
+import argparse
+import gc
+import logging
+import random
+import sys
+import time
+
+from benchmarks.corpus import generate_table
+from parser_core.bounded_parse import OK, TIMEOUT, ParseBudget, parse_bounded
+from parser_core.ddl_stream import iter_statements
+
+SIZES = (2 ** 16, 2 ** 18, 2 ** 20)
+FULL_SIZES = SIZES + (5 * 2 ** 20,)
+_HEAD = "CREATE TABLE dbo.worst_case ("
+_UNBOUNDED = ParseBudget(None, None)
+TIMEOUT_BUDGET = 0.01
+# ritardo massimo ammesso nell'interruzione: il tempo limite e' verificato tra un token e l'altro
+TIMEOUT_SLACK = 0.25
+
+
+def _repeat(head: str, unit: str, size: int, tail: str = "") -> str:
+    return head + unit * max(1, (size - len(head) - len(tail)) // len(unit)) + tail
+
+
+def _unclosed_string(size):
+    return _repeat(_HEAD + "a VARCHAR(10) DEFAULT '", "x'',(", size)
+
+
+def _unclosed_comment(size):
+    return _repeat(_HEAD + "a INT /*", "* /,(*", size)
+
+
+def _unclosed_identifier(size):
+    return _repeat(_HEAD + '"a', "b, (c", size)
+
+
+def _deep_parens(size):
+    depth = max(1, (size - len(_HEAD) - 40) // 2)
+    return _HEAD + "a INT CHECK (" + "(" * depth + "1" + ")" * depth + "), b INT)"
+
+
+def _unclosed_parens(size):
+    return _repeat(_HEAD + "a INT CHECK (", "(a,", size)
+
+
+def _giant_check(size):
+    return _repeat(_HEAD + "a VARCHAR(10) CHECK (a IN (", "'v,(1)', ", size, "'z')), b INT)")
+
+
+def _wide_table(size):
+    unit = "c{} DECIMAL(18,2) NOT NULL DEFAULT (0), "
+    count = max(1, size // len(unit.format(100000)))
+    return _HEAD + "".join(unit.format(i) for i in range(count)) + "PRIMARY KEY (c0))"
+
+
+def _dotted_header(size):
+    return _repeat("CREATE TABLE ", "a.", size, "t (x INT)")
+
+
+def _repeated_create(size):
+    return _repeat("", "CREATE OR REPLACE ", size, "TABLE t (x INT)")
+
+
+def _commas(size):
+    return _repeat(_HEAD, ",", size, ")")
+
+
+def _multiword_types(size):
+    return _repeat(_HEAD, "a TIMESTAMP(6) WITH LOCAL TIME, b INTERVAL DAY(2) TO, ", size, "c INT)")
+
+
+def _fk_lists(size):
+    return _repeat(_HEAD + "a INT, ", "FOREIGN KEY (a, b, c) REFERENCES x.y.z (a, b, c), ", size, "b INT)")
+
+
+_MUTATION_CHARS = "()'\"`[]/*-,; \n"
+
+
+def _fuzz(size, seed: int = 7):
+    """Tabelle del corpus sintetico con mutazioni casuali: caratteri speciali inseriti, tagli, duplicazioni."""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    index = 0
+    while total < size:
+        ddl = generate_table(seed + index, 200, index).ddl
+        index += 1
+        chars = list(ddl)
+        for _ in range(len(chars) // 50):
+            pos = rng.randrange(len(chars))
+            op = rng.random()
+            if op < 0.5:
+                chars.insert(pos, rng.choice(_MUTATION_CHARS))
+            elif op < 0.8:
+                del chars[pos]
+            else:
+                chars[pos:pos] = chars[pos:pos + rng.randrange(1, 20)]
+        ddl = "".join(chars)
+        # solo la prima tabella mantiene l'intestazione: le altre allungano la stessa istruzione
+        parts.append(ddl if index == 1 else ddl.replace("CREATE", "C", 1))
+        total += len(parts[-1])
+    return "".join(parts)[:size]
+
+
+# nome -> funzione dimensione -> DDL
+FAMILIES = {
+    'unclosed_string': _unclosed_string,
+    'unclosed_comment': _unclosed_comment,
+    'unclosed_identifier': _unclosed_identifier,
+    'deep_parens': _deep_parens,
+    'unclosed_parens': _unclosed_parens,
+    'giant_check': _giant_check,
+    'wide_table': _wide_table,
+    'dotted_header': _dotted_header,
+    'repeated_create': _repeated_create,
+    'commas': _commas,
+    'multiword_types': _multiword_types,
+    'fk_lists': _fk_lists,
+    'fuzz': _fuzz,
+}
+
+
+def _parse_all(ddl: str) -> list:
+    """Parsing diretto e tramite lo splitter dei dump (stesso testo come file di una riga per istruzione)."""
+    results = [parse_bounded(ddl, _UNBOUNDED)]
+    results += [parse_bounded(s.text, _UNBOUNDED) for s in iter_statements(ddl.splitlines(True))]
+    return results
+
+
+def _timed(ddl: str, min_seconds: float = 0.05):
+    """Secondi per esecuzione (ripetuta fino a min_seconds: gli input piccoli non misurano rumore)."""
+    loops = 0
+    start = time.perf_counter()
+    while True:
+        results = _parse_all(ddl)
+        loops += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / loops, results
+
+
+def measure_family(make, sizes=SIZES, repeat: int = 2) -> dict:
+    """dimensione -> (secondi migliori, caratteri, esiti)."""
+    measures = {}
+    for size in sizes:
+        ddl = make(size)
+        best = float('inf')
+        results = []
+        for _ in range(repeat):
+            gc.collect()
+            seconds, results = _timed(ddl)
+            best = min(best, seconds)
+        measures[size] = (best, len(ddl), sorted({r.status for r in results}))
+    return measures
+
+
+def check_timeout(make, size: int, max_seconds: float = TIMEOUT_BUDGET):
+    """Esito e durata del parsing dell'input con un budget di tempo minimo."""
+    ddl = make(size)
+    start = time.perf_counter()
+    result = parse_bounded(ddl, ParseBudget(None, max_seconds))
+    return result.status, time.perf_counter() - start
+
+
+def run(families=None, sizes=SIZES, max_growth: float = 3.0, repeat: int = 2):
+    """Ritorna (righe del report, problemi)."""
+    lines = [f"{'famiglia':<22}" + "".join(f"{s // 1024:>10}K" for s in sizes) + f"{'crescita':>10}{'esiti':>18}"]
+    problems = []
+    for name in families or FAMILIES:
+        make = FAMILIES[name]
+        measures = measure_family(make, sizes, repeat)
+        per_char = [seconds / chars for seconds, chars, _ in measures.values()]
+        growth = max((b / a for a, b in zip(per_char, per_char[1:]) if a), default=0.0)
+        statuses = sorted({s for _, _, st in measures.values() for s in st})
+        lines.append(f"{name:<22}" + "".join(f"{m[0] * 1000:>9.1f}ms" for m in measures.values())
+                     + f"{growth:>9.2f}x{','.join(statuses):>18}")
+        if growth > max_growth:
+            problems.append(f"{name}: tempo per carattere x{growth:.1f} tra due dimensioni consecutive")
+        if statuses != [OK]:
+            problems.append(f"{name}: esiti inattesi senza budget {statuses}")
+        status, elapsed = check_timeout(make, sizes[-1])
+        if measures[sizes[-1]][0] > 10 * TIMEOUT_BUDGET and status != TIMEOUT:
+            problems.append(f"{name}: budget di {TIMEOUT_BUDGET} s non applicato (esito {status})")
+        if elapsed > TIMEOUT_BUDGET + TIMEOUT_SLACK:
+            problems.append(f"{name}: interruzione tardiva dopo {elapsed:.3f} s")
+    return lines, problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Corpus di casi peggiori e verifica di linearita' del parser")
+    parser.add_argument("--families", nargs="+", choices=list(FAMILIES), default=list(FAMILIES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES))
+    parser.add_argument("--full", action="store_true", help="aggiunge un input da 5 MB per famiglia")
+    parser.add_argument("--max-growth", type=float, default=3.0)
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args(argv)
+    # i timeout attesi sono registrati come errori: nessun output sul terminale
+    logging.getLogger("info_DDL_oop").addHandler(logging.NullHandler())
+    sizes = tuple(FULL_SIZES if args.full else sorted(args.sizes))
+    lines, problems = run(args.families, sizes, args.max_growth, args.repeat)
+    print("\n".join(lines))
+    for problem in problems:
+        print(f"REGRESSIONE: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Sviluppatore: Antonio Nunziante
+Pipeline dichiarativa di trasformazioni su DataFrame.
+
+Una pipeline e' una sequenza di Stage: ogni stage dichiara le colonne che
+legge e la colonna che produce, e calcola i valori con una sola operazione
+vettoriale. Lo schema di input (DataFrame non vuoto, colonne sorgente
+presenti) e' validato una volta per esecuzione; gli stage successivi
+leggono i risultati dei precedenti senza copie intermedie del DataFrame e
+le colonne prodotte sono scritte nel DataFrame una sola volta, alla fine.
+
+Per ogni stage vengono registrati tempo e righe elaborate (last_run per
+l'ultima esecuzione, totals cumulativi) e il tempo e' osservato anche
+nell'istogramma di fase transform.<stage> (parser_core/metrics.py). Un nuovo sistema target aggiunge
+stage, non passaggi sul DataFrame.
+"""
+
+import logging
+import time
+from typing import Callable, NamedTuple
+
+import pandas as pd
+
+from common_trx.transformations import map_column_values
+from parser_core.metrics import METRICS
+
+logger = logging.getLogger("transformations")
+
+
+class Stage(NamedTuple):
+    name: str
+    inputs: tuple           # colonne lette (sorgente o prodotte da stage precedenti)
+    output: str             # colonna prodotta (o riscritta)
+    func: Callable          # func(*colonne di input, **contesto) -> Series/array allineato alle righe
+
+
+class StageTiming(NamedTuple):
+    name: str
+    seconds: float
+    rows: int
+
+
+class TransformPipeline:
+    def __init__(self, name: str, stages):
+        self.name = name
+        self.stages = tuple(stages)
+        produced = set()
+        required = []
+        for stage in self.stages:
+            required.extend(c for c in stage.inputs if c not in produced and c not in required)
+            produced.add(stage.output)
+        # colonne che il DataFrame in input deve contenere
+        self.required_columns = tuple(required)
+        self.outputs = tuple(dict.fromkeys(stage.output for stage in self.stages))
+        self.last_run = []
+        self.totals = {stage.name: [0, 0.0, 0] for stage in self.stages}     # esecuzioni, secondi, righe
+
+    def then(self, *stages) -> "TransformPipeline":
+        """Nuova pipeline con gli stage aggiunti in coda (es. per un altro sistema target)."""
+        return TransformPipeline(self.name, self.stages + stages)
+
+    def validate(self, df):
+        if df.empty:
+            logger.error("|TransformPipeline.validate| %s: DataFrame vuoto", self.name)
+            raise ValueError(f"DataFrame vuoto: impossibile eseguire la pipeline {self.name}")
+        missing = [c for c in self.required_columns if c not in df.columns]
+        if missing:
+            logger.error("|TransformPipeline.validate| %s: colonne %s non trovate", self.name, missing)
+            raise KeyError(f"Colonne {missing} non presenti nel DataFrame")
+
+    def run(self, df, **context):
+        """
+        Esegue gli stage su df e aggiunge (in place) le colonne prodotte.
+        context e' passato a ogni stage (es. lookup dei tipi, regole).
+        """
+        self.validate(df)
+        rows = len(df.index)
+        columns = {}
+        timings = []
+        for stage in self.stages:
+            start = time.perf_counter()
+            args = [columns[c] if c in columns else df[c] for c in stage.inputs]
+            columns[stage.output] = stage.func(*args, **context)
+            seconds = time.perf_counter() - start
+            timings.append(StageTiming(stage.name, seconds, rows))
+            total = self.totals[stage.name]
+            total[0] += 1
+            total[1] += seconds
+            total[2] += rows
+            METRICS.observe(f"transform.{stage.name}", seconds)
+        for name in self.outputs:
+            values = columns[name]
+            df[name] = values if isinstance(values, pd.Series) else pd.Series(values, index=df.index)
+        self.last_run = timings
+        logger.debug("|TransformPipeline.run| %s: %d righe, %s", self.name, rows,
+                     ", ".join(f"{t.name}={t.seconds * 1000:.2f}ms" for t in timings))
+        return df
+
+    def report(self) -> dict:
+        """stage -> esecuzioni, secondi totali, righe totali."""
+        return {name: {'runs': runs, 'seconds': round(seconds, 6), 'rows': rows}
+                for name, (runs, seconds, rows) in self.totals.items()}
+
+
+# -------------------------
+# STAGE RIUSABILI
+# -------------------------
+def map_types(datatype, lookup=None, **context):
+    """
+    Datatype sorgente -> datatype target (lookup normalizzata, calcolata sui
+    soli valori distinti). I datatype presenti ma senza corrispondenza sono
+    contati in unmapped_types.
+    """
+    result = map_column_values(datatype, lookup)
+    unmapped = int(result.isna().sum() - datatype.isna().sum())
+    if unmapped > 0:
+        METRICS.inc('unmapped_types', unmapped)
+    return result
+
+
+def present_length(length, **context):
+    """Lunghezza sorgente come object, NaN dove assente (0 o nulla)."""
+    return length.astype(object).where(length.notna() & (length != 0))
+
+
+def upper(values, **context):
+    return values.str.upper()
+
+
+def length_rules(target_dtype, length, target_length, rules=None, **context):
+    """
+    Regole deterministiche sulla lunghezza target (vedi snowflake_conf.LENGTH_RULES):
+    una maschera per regola su tutte le righe.
+    """
+    result = target_length.to_numpy(dtype=object, copy=True)
+    target_dtype = target_dtype.to_numpy(dtype=object)
+    for datatype, (source_lengths, value) in (rules or {}).items():
+        mask = target_dtype == datatype
+        if source_lengths is not None:
+            mask &= length.isin(source_lengths).to_numpy()
+        result[mask] = value
+    return pd.Series(result, index=target_length.index, name=target_length.name, dtype=object)
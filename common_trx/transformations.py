@@ -1,31 +1,42 @@
 import logging
-from datetime import datetime
-import os
+import numpy as np
+import pandas as pd
 from mainconfig import config
 
-log_dir = config.log_dir
-today = datetime.now().strftime("%Y%m%d")
 logger = logging.getLogger("transformations")
-log_file = f"{log_dir}/{config.log_filename}_{today}.log"
-logger.setLevel(logging.DEBUG)
-os.makedirs(log_dir, exist_ok=True)
+
+
+def normalize_type_name(datatype: str) -> str:
+    """Chiave di lookup del datatype: maiuscolo, spazi singoli ('double  precision' -> 'DOUBLE PRECISION')."""
+    return " ".join(datatype.upper().split())
 
 
 def build_reverse_typemap(typemap: dict, source_system: str) -> dict:
     reverse = {}
-    logger.debug(f"|build_reverse_typemap| , richiamato reverse_typemap per il source system:{source_system}")
-    logger.debug(f"|build_reverse_typemap| , avvio ciclo di matching per :{source_system}")
+    logger.debug("|build_reverse_typemap| , richiamato reverse_typemap per il source system:%s", source_system)
     for target_type, systems in typemap.items():
         if source_system not in systems:
-            logger.debug(f"|build_reverse_typemap| , ciclato source system non corrispondente:{source_system} : {systems}")
             continue
 
         for src_type in systems[source_system]:
-            logger.debug(
-                f"|build_reverse_typemap| , ciclato source system corrispondente:{source_system} : {systems}")
-            reverse[src_type.upper()] = target_type
+            reverse[normalize_type_name(src_type)] = target_type
     return reverse
 
+
+def map_column_values(series, lookup, default=None):
+    """
+    Mappa una colonna tramite lookup calcolando la chiave solo sui valori
+    distinti: factorize -> mapping dei valori unici -> take sui codici.
+    Valori nulli o non presenti nella lookup diventano default.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    mapped = np.array(
+        [lookup.get(normalize_type_name(u), default) if isinstance(u, str) else default for u in uniques] + [default],
+        dtype=object
+    )
+    # il sentinel -1 dei nulli punta all'ultimo elemento (default)
+    return pd.Series(mapped[codes], index=series.index, name=series.name)
+
 def generate_additional_dtype_cols(df_source, reverse_typemap: dict):
     logger.debug("|generate_additional_dtype_cols| aggiunta datatype Snowflake")
 
@@ -41,12 +52,7 @@ def generate_additional_dtype_cols(df_source, reverse_typemap: dict):
         logger.error("|generate_additional_dtype_cols| reverse_typemap vuoto o None")
         raise ValueError("reverse_typemap non valido")
 
-    df_source[config.add_field_dtype] = (
-        df_source["datatype"]
-        .astype(str)
-        .str.upper()
-        .map(reverse_typemap)
-    )
+    df_source[config.add_field_dtype] = map_column_values(df_source["datatype"], reverse_typemap)
 
     return df_source
 
@@ -60,8 +66,10 @@ def generate_additional_length_cols(df):
         logger.error("|generate_additional_length_cols| Colonna 'length' non trovata")
         raise KeyError("Colonna 'length' non presente nel DataFrame")
 
+    # object: le regole Snowflake scrivono sia interi che stringhe
     df[config.add_field_length] = (
         df["length"]
+        .astype(object)
         .where(df["length"].notna() & (df["length"] != 0))
     )
     return df
@@ -71,7 +79,7 @@ def generate_additional_upper_cols(df):
         logger.error("|generate_additional_upper_cols| DataFrame vuoto")
         raise ValueError("DataFrame vuoto: impossibile generare UPPER")
     if "column_name" not in df.columns:
-        logger.error(f"generate_additional_upper_cols| Colonna 'column_name' non trovata")
+        logger.error("|generate_additional_upper_cols| Colonna 'column_name' non trovata")
         raise KeyError("Colonna 'column_name' non presente nel DataFrame")
     df[config.add_field_upper] = (df["column_name"].str.upper())
     return df
@@ -81,7 +89,7 @@ def get_elements(df, field):
     Estrae una lista di valori da una colonna di un DataFrame Pandas,
     applicando controlli di validità sul contenuto.
     """
-    logger.info(f"|get_elements| estraggo lista elementi per {field}")
+    logger.debug("|get_elements| estraggo lista elementi per %s", field)
 
     if df.empty:
         logger.error("|get_elements| DataFrame vuoto")
@@ -94,9 +102,9 @@ def get_elements(df, field):
     return df[field].tolist()
 
 def count_df_elements(df, fields):
-    logger.debug(f"|count_df_elements| DataFrame in esame per conteggio, sul campo {fields}")
+    logger.debug("|count_df_elements| DataFrame in esame per conteggio")
     if df.empty:
         logger.error("|count_df_elements| DataFrame vuoto")
         raise ValueError("DataFrame vuoto")
-    count_df = df.groupby(fields).count()
-    return count_df
\ No newline at end of file
+    # fields e' la lista CSV dei nomi colonna: il conteggio e' sulle righe trasformate
+    return len(df.index)
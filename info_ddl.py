@@ -3,10 +3,9 @@ Sviluppatore: Antonio Nunziante
 """
 
 import re  # Importa il modulo delle espressioni regolari
-import pandas as pd
 import logging
 
-from IPython.display import display
+from parser_core.ddl_records import ColumnMeta, TableMeta, intern_name
 
 # Estrae database, schema e nome tabella da una DDL CREATE TABLE
 
@@ -172,40 +171,33 @@ def get_columns_info(ddl: str,out = 'dataframe') :
     defs = split_column_defs(block)  # Divide in definizioni singole
     pk = get_primary_keys(ddl)  # Lista dei nomi delle colonne PK
     fk = get_foreign_keys(ddl)  # Lista di dict con info FK
-    metadata = []
+    records = []
     for d in defs:
         name = parse_column_name(d)  # Estrae nome colonna
         dtype = parse_datatype(d)  # Estrae tipo colonna
         length = parse_length(d)  # Estrae lunghezza colonna, se presente
         if name and dtype:
-            info = {'fully_qualified_table':fq_table,'database':database, 'schema_name':schema,'table_name':table, 'column_name': name, 'datatype': dtype}  # Dizionario colonna base
-            if length is not None:
-                info['length'] = length  # Aggiunge lunghezza se trovata
-            else:
-                info['length'] = 0  # Aggiunge lunghezza se trovata
-            # Chiave primaria
-            info['is_key'] = 'Y' if name in pk else 'N'
             # Chiave esterna (se presente), altrimenti None
             fk_entry = next((entry for entry in fk if entry['column'] == name), None)
-            if fk_entry:
-                info['is_foreign'] = 'Y'
-                info['foreign_table'] = fk_entry['ref_table']
-                info['foreign_key'] = fk_entry['ref_column']
-            else:
-                info['is_foreign'] = 'N'
-                info['foreign_table'] = None
-                info['foreign_key'] = None
-            metadata.append(info)  # Aggiunge la colonna all'elenco
-    if out=='dict':
-        return metadata
+            records.append(ColumnMeta(  # Record compatto della colonna
+                intern_name(name),
+                intern_name(dtype),
+                length if length is not None else 0,  # 0 se lunghezza non trovata
+                'Y' if name in pk else 'N',  # Chiave primaria
+                'Y' if fk_entry else 'N',
+                fk_entry['ref_table'] if fk_entry else None,
+                fk_entry['ref_column'] if fk_entry else None
+            ))
+    # L'identita' della tabella e' memorizzata una sola volta
+    meta = TableMeta(intern_name(fq_table), intern_name(database), intern_name(schema), intern_name(table), tuple(records))
+    if out == 'records':
+        return meta
+    elif out=='dict':
+        return meta.to_dict()
     elif out =='dataframe':
-        if not metadata:
-            return pd.DataFrame()
-        else:
-            df=pd.DataFrame(metadata)
-        return df[metadata[0].keys()]
+        return meta.to_dataframe()
     else:
-        raise ValueError("Parametro out non valido.Usare dict o dataframe")
+        raise ValueError("Parametro out non valido.Usare dict, dataframe o records")
 
 
 # Esempio di utilizzo
@@ -4,6 +4,8 @@ from datetime import datetime
 
 log_dir = './logs'
 log_filename = 'info_DDL'
+log_level = 'INFO'
+log_debug_buffer = 2000  # record DEBUG in memoria, scritti solo su errore (0 = disattivo)
 
 input_dir = './in'
 output_dir = './out'
@@ -11,4 +13,38 @@ output_dir = './out'
 #APP_CONFIG
 add_field_dtype = "add_dtype"
 add_field_length = "add_length"
-add_field_upper = "upper_col_name"
\ No newline at end of file
+add_field_upper = "upper_col_name"
+
+#MASSIVE_INGEST
+ingest_pattern = '*.sql'
+ingest_workers = None  # None = os.cpu_count()
+ingest_chunksize = 16
+ingest_output_filename = 'ddl_metadata.csv'
+ingest_errors_filename = 'ddl_errors.csv'
+ingest_snowflake_ddl_filename = 'snowflake_ddl.sql'  # con --emit-ddl (richiede --source-db)
+ingest_shard_bytes = 64 * 2 ** 20  # file piu' grandi divisi in shard tramite indice a offset (None = mai)
+ingest_cache_path = None  # es. './cache/parse_cache.sqlite' per attivare la cache
+
+#PARSE_CACHE
+cache_memory_items = 4096
+cache_max_bytes = 512 * 1024 * 1024
+cache_sync_every = 50  # commit tra due letture della dimensione condivisa su disco (oltre che vicino al limite)
+
+#PARSE_SERVER
+server_address = './run/parse_server.sock'  # socket Unix, oppure "127.0.0.1:8765" per TCP locale
+server_workers = None  # None = os.cpu_count()
+server_max_batch = 64  # DDL massime per micro-batch inviato a un worker
+server_max_delay_ms = 2.0  # attesa massima per completare un micro-batch
+server_warm_sources = ('sql_server', 'oracle')  # type map Snowflake precompilate all'avvio dei worker
+
+#BOUNDED_PARSE
+parse_max_chars = 8 * 2 ** 20  # caratteri massimi per istruzione (None = nessun limite)
+parse_max_seconds = 10.0  # tempo massimo di parsing per istruzione (None = nessun limite)
+
+#METRICS
+metrics_enabled = True  # contatori e istogrammi di latenza per fase (parser_core/metrics.py)
+ingest_metrics_path = None  # es. './out/ddl_metrics.prom' o './out/ddl_metrics.json'
+
+#TEMPLATES
+template_dedup = True  # tabelle con la stessa forma parsate una volta (parser_core/ddl_templates.py)
+template_cache_items = 10000  # forme distinte tenute in memoria per processo (LRU)
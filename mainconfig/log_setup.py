@@ -0,0 +1,130 @@
+"""
+Sviluppatore: Antonio Nunziante
+Configurazione del logging a basso overhead.
+
+Nessun handler viene configurato all'import dei moduli: gli entry point
+(script, FE, ingestione massiva) chiamano configure_logging().
+
+- i record INFO+ passano da una QueueHandler e vengono scritti su file da
+  un thread dedicato (QueueListener): il chiamante non attende l'I/O;
+- i record DEBUG dei logger del parser restano in un ring buffer in memoria,
+  non formattati, e vengono scritti solo se una tabella fallisce
+  (flush_debug_buffer).
+"""
+
+import atexit
+import logging
+import os
+import queue
+from collections import deque
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+from mainconfig import config
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# logger dei moduli del parser: DEBUG solo se il ring buffer e' attivo
+PARSER_LOGGERS = ("info_DDL_oop", "Snowflake_extension", "transformations", "massive_ingest", "parse_server")
+
+_state = {}
+
+
+class RingBufferHandler(logging.Handler):
+    """Conserva gli ultimi record sotto la soglia del file, senza formattarli."""
+
+    def __init__(self, capacity: int, below: int):
+        super().__init__(logging.DEBUG)
+        self.records = deque(maxlen=capacity)
+        self.below = below
+
+    def handle(self, record):
+        # nessun lock/filtro: deque.append e' thread-safe e la formattazione e' rimandata
+        if record.levelno < self.below:
+            self.records.append(record)
+        return True
+
+    def emit(self, record):
+        self.handle(record)
+
+    def drain(self) -> list:
+        records = list(self.records)
+        self.records.clear()
+        return records
+
+
+def _log_file(log_dir: str) -> str:
+    today = datetime.now().strftime("%Y%m%d")
+    return f"{log_dir}/{config.log_filename}_{today}.log"
+
+
+def configure_logging(level=None, log_dir: str = None, debug_buffer: int = None):
+    """
+    Attiva il logging su file giornaliero tramite coda non bloccante.
+    Idempotente: una seconda chiamata (o la chiamata in un processo figlio)
+    sostituisce la configurazione precedente.
+    """
+    level = level or config.log_level
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    log_dir = log_dir or config.log_dir
+    debug_buffer = config.log_debug_buffer if debug_buffer is None else debug_buffer
+    shutdown_logging()
+
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = logging.FileHandler(_log_file(log_dir), mode="a", encoding="utf-8", delay=True)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setLevel(level)
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    ring = None
+    if debug_buffer:
+        ring = RingBufferHandler(debug_buffer, below=level)
+        root.addHandler(ring)
+    parser_level = logging.DEBUG if ring else level
+    for name in PARSER_LOGGERS:
+        logging.getLogger(name).setLevel(parser_level)
+
+    _state.update(pid=os.getpid(), listener=listener, queue_handler=queue_handler, ring=ring)
+    if not _state.get("atexit"):
+        atexit.register(shutdown_logging)
+        _state["atexit"] = True
+
+
+def flush_debug_buffer(reason: str = None) -> int:
+    """
+    Scrive su file i record DEBUG recenti (es. quando una tabella fallisce il
+    parsing) e svuota il buffer. Ritorna il numero di record scritti.
+    """
+    ring = _state.get("ring")
+    queue_handler = _state.get("queue_handler")
+    if ring is None or queue_handler is None:
+        return 0
+    records = ring.drain()
+    if reason:
+        logging.getLogger("info_DDL_oop").warning(
+            "|flush_debug_buffer| %s - %d record DEBUG recenti", reason, len(records))
+    for record in records:
+        queue_handler.handle(record)
+    return len(records)
+
+
+def shutdown_logging():
+    """Svuota la coda e rimuove gli handler installati da configure_logging."""
+    listener = _state.pop("listener", None)
+    root = logging.getLogger()
+    for key in ("queue_handler", "ring"):
+        handler = _state.pop(key, None)
+        if handler is not None:
+            root.removeHandler(handler)
+    # in un processo figlio (fork) il thread del listener non esiste
+    if listener is not None and _state.get("pid") == os.getpid():
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
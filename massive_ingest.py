@@ -1 +1,263 @@
-input_dir = "in"
\ No newline at end of file
+"""
+Sviluppatore: Antonio Nunziante
+Ingestione massiva di file DDL.
+
+Percorre config.input_dir, distribuisce i file su un pool di processi e
+scrive in config.output_dir un unico CSV con i metadati di colonna, in
+ordine deterministico (percorso relativo del file, poi ordine delle
+istruzioni nel file). I worker restituiscono record compatti (ColumnMeta):
+l'identita' della tabella viaggia una sola volta per tabella.
+
+I file oltre config.ingest_shard_bytes vengono indicizzati una volta
+(parser_core.ddl_index, indice <dump>.ddlidx riusato tra esecuzioni) e
+divisi in shard contigui: ogni worker legge solo le proprie istruzioni.
+
+Ogni worker restituisce anche le metriche del task (parser_core.metrics):
+il processo principale le unisce e, con --metrics o
+config.ingest_metrics_path, le esporta a fine esecuzione.
+
+Con config.template_dedup le tabelle con la stessa forma (partizioni,
+gemelle ST/ODS, copie per tenant) sono parsate una volta per worker
+(parser_core.ddl_templates).
+
+Uso:
+    python massive_ingest.py [--source-db sql_server] [--workers 8] [--metrics ./out/ddl_metrics.prom]
+"""
+
+import argparse
+import csv
+import logging
+import os
+import time
+from functools import partial
+from multiprocessing import Pool
+from pathlib import Path
+
+from mainconfig import config
+from mainconfig.log_setup import configure_logging, flush_debug_buffer
+from parser_core.ddl_records import COLUMN_FIELDS, TABLE_FIELDS
+from parser_core.bounded_parse import parse_bounded
+from parser_core.ddl_index import index_dump
+from parser_core.ddl_stream import iter_statements
+from parser_core.ddl_templates import TemplateCache
+from parser_core.parse_cache import ParseCache
+from parser_core.info_ddl_oop import DDLInfo
+from parser_core.metrics import METRICS
+from snowflake.Snowflake_extension_engine import convert_catalog
+from snowflake.ddl_emitter import SnowflakeDDLWriter
+
+logger = logging.getLogger("massive_ingest")
+
+SNOWFLAKE_FIELDS = (config.add_field_dtype, config.add_field_length, config.add_field_upper)
+
+
+def discover_files(input_dir, pattern: str = None) -> list:
+    """Elenco ordinato dei file DDL sotto input_dir (ricorsivo)."""
+    root = Path(input_dir)
+    return sorted(p for p in root.rglob(pattern or config.ingest_pattern) if p.is_file())
+
+
+def _blank_nan(value):
+    # add_length usa NaN per "nessuna lunghezza"
+    return '' if value != value else value
+
+
+def _snowflake_tables(metas, source_db) -> list:
+    """Conversione Snowflake batch di tutte le tabelle di un file, poi divisa per tabella."""
+    df = convert_catalog(metas, source_db)
+    rows = [
+        tuple(_blank_nan(v) for v in row)
+        for row in df[list(COLUMN_FIELDS + SNOWFLAKE_FIELDS)].itertuples(index=False, name=None)
+    ]
+    tables = []
+    start = 0
+    for meta in metas:
+        end = start + len(meta.columns)
+        tables.append((meta.identity, rows[start:end]))
+        start = end
+    return tables
+
+
+_cache = None
+_templates = None
+
+
+def init_worker(cache_path: str = None):
+    """Inizializzatore dei processi del pool: logging, cache di parsing e template per forma."""
+    global _cache, _templates
+    configure_logging()
+    _cache = ParseCache(cache_path) if cache_path else None
+    # i template durano quanto il worker: la deduplicazione vale tra file diversi
+    _templates = TemplateCache(_cache.parse if _cache else DDLInfo) if config.template_dedup else None
+
+
+def plan_tasks(files: list, workers: int, shard_bytes: int = None) -> list:
+    """
+    Task (path, shard, shards) in ordine di input. I file piu' grandi di
+    shard_bytes sono indicizzati qui, nel processo principale, cosi' i worker
+    trovano l'indice gia' pronto.
+    """
+    tasks = []
+    for path in files:
+        size = os.path.getsize(path)
+        shards = 1
+        if shard_bytes and workers > 1 and size > shard_bytes:
+            shards = min(workers, -(-size // shard_bytes), len(index_dump(path)) or 1)
+        tasks.extend((path, shard, shards) for shard in range(shards))
+    return tasks
+
+
+def _statements(path: str, shard: int, shards: int):
+    if shards == 1:
+        return iter_statements(path)
+    index = index_dump(path)
+    return index.iter_statements(index.shard(shard, shards))
+
+
+def _ingest_task(task: tuple, source_db: str = None):
+    path, shard, shards = task
+    return ingest_file(path, source_db, shard, shards)
+
+
+def ingest_file(path: str, source_db: str = None, shard: int = 0, shards: int = 1):
+    """
+    Worker: parsa tutte le CREATE TABLE di un file (o del solo shard indicato).
+    Ritorna (path, tabelle, errori, (hit, lookup) di cache, metriche) dove tabelle e' una lista di
+    (identita', righe colonna), errori una lista di (riga, messaggio) e metriche lo
+    snapshot del task (il registro del worker riparte da zero a ogni task).
+    """
+    METRICS.reset()
+    if _cache is not None:
+        parser = _cache.parse
+        before = _cache.report()
+    else:
+        parser = DDLInfo
+    if _templates is not None:
+        parser = _templates.parse
+    metas = []
+    errors = []
+    try:
+        for statement in _statements(path, shard, shards):
+            # budget di dimensione e tempo: un'istruzione anomala diventa un errore, non un blocco
+            result = parse_bounded(statement.text, parser=parser, ddl_name=f"{path}:{statement.line}")
+            if not result.ok:
+                errors.append((statement.line, result.error))
+                continue
+            meta = result.table
+            if meta.columns:
+                metas.append(meta)
+            elif source_db:
+                # come SnowflakeExtend: una tabella senza colonne non e' convertibile
+                errors.append((statement.line, "DataFrame vuoto: impossibile inizializzare SnowflakeExtend"))
+                logger.error("|ingest_file| %s:%s tabella senza colonne: %s", path, statement.line, meta.identity)
+                flush_debug_buffer(f"ingest_file: tabella senza colonne {path}:{statement.line}")
+    except OSError as e:
+        errors.append((0, f"{type(e).__name__}: {e}"))
+        METRICS.inc('failures', reason='io')
+        logger.error("|ingest_file| %s: %s", path, e)
+        flush_debug_buffer(f"ingest_file: errore di lettura {path}")
+    if source_db and metas:
+        # conversione Snowflake una volta per file invece che per tabella
+        tables = _snowflake_tables(metas, source_db)
+    else:
+        tables = [(meta.identity, meta.columns) for meta in metas]
+    lookups = (0, 0)
+    if _cache is not None:
+        # commit per file: i worker del pool vengono terminati senza finalizzazione
+        _cache.commit()
+        after = _cache.report()
+        hits = sum(after[k] - before[k] for k in ('memory_hits', 'disk_hits'))
+        lookups = (hits, hits + after['misses'] - before['misses'])
+    return path, tables, errors, lookups, METRICS.snapshot()
+
+
+def run(input_dir=None, output_dir=None, workers=None, chunksize=None, source_db=None, pattern=None,
+        cache_path=None, emit_ddl: bool = False, shard_bytes=None, metrics_path=None) -> dict:
+    input_dir = Path(input_dir or config.input_dir)
+    output_dir = Path(output_dir or config.output_dir)
+    workers = workers or config.ingest_workers or os.cpu_count()
+    chunksize = chunksize or config.ingest_chunksize
+    cache_path = cache_path or config.ingest_cache_path
+    shard_bytes = config.ingest_shard_bytes if shard_bytes is None else shard_bytes
+    metrics_path = metrics_path or config.ingest_metrics_path
+    if emit_ddl and not source_db:
+        raise ValueError("emit_ddl richiede source_db: le DDL Snowflake usano i datatype convertiti")
+    os.makedirs(output_dir, exist_ok=True)
+
+    files = [str(p) for p in discover_files(input_dir, pattern)]
+    tasks = plan_tasks(files, workers, shard_bytes)
+    header = ('source_file',) + TABLE_FIELDS + COLUMN_FIELDS + (SNOWFLAKE_FIELDS if source_db else ())
+    stats = {'files': len(files), 'tasks': len(tasks), 'tables': 0, 'columns': 0, 'errors': 0, 'cache_hits': 0, 'cache_lookups': 0,
+             'template_hits': 0}
+    start = time.perf_counter()
+    # metriche dell'esecuzione: somma degli snapshot dei worker
+    METRICS.reset()
+
+    with open(output_dir / config.ingest_output_filename, 'w', newline='', encoding='utf-8') as out, \
+            open(output_dir / config.ingest_errors_filename, 'w', newline='', encoding='utf-8') as err, \
+            Pool(processes=workers, initializer=init_worker, initargs=(cache_path,)) as pool:
+        ddl_writer = SnowflakeDDLWriter(output_dir / config.ingest_snowflake_ddl_filename) if emit_ddl else None
+        out_writer = csv.writer(out)
+        err_writer = csv.writer(err)
+        out_writer.writerow(header)
+        err_writer.writerow(('source_file', 'line', 'error'))
+        # imap conserva l'ordine di input: l'output e' deterministico
+        for path, tables, errors, (hits, lookups), metrics in pool.imap(partial(_ingest_task, source_db=source_db), tasks, chunksize):
+            rel = os.path.relpath(path, input_dir)
+            for identity, columns in tables:
+                prefix = (rel,) + identity
+                out_writer.writerows(prefix + c for c in columns)
+                if ddl_writer is not None:
+                    ddl_writer.write_table(identity, columns)
+                stats['columns'] += len(columns)
+            stats['tables'] += len(tables)
+            for line, message in errors:
+                err_writer.writerow((rel, line, message))
+            stats['errors'] += len(errors)
+            stats['cache_hits'] += hits
+            stats['cache_lookups'] += lookups
+            METRICS.merge(metrics)
+        if ddl_writer is not None:
+            ddl_writer.close()
+            stats['ddl_statements'] = ddl_writer.stats['statements']
+
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    stats['template_hits'] = METRICS.value('template_hits')
+    if cache_path:
+        lookups = stats['cache_lookups']
+        stats['cache_hit_rate'] = round(stats['cache_hits'] / lookups, 4) if lookups else 0.0
+    if metrics_path:
+        METRICS.write(metrics_path)
+        stats['metrics'] = str(metrics_path)
+    logger.info("|run| %s", stats)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestione massiva di file DDL")
+    parser.add_argument("--input-dir", default=config.input_dir)
+    parser.add_argument("--output-dir", default=config.output_dir)
+    parser.add_argument("--pattern", default=config.ingest_pattern)
+    parser.add_argument("--workers", type=int, default=config.ingest_workers)
+    parser.add_argument("--chunksize", type=int, default=config.ingest_chunksize)
+    parser.add_argument("--source-db", default=None,
+                        help="sistema sorgente (es. sql_server, oracle): abilita la conversione Snowflake")
+    parser.add_argument("--cache", default=config.ingest_cache_path,
+                        help="file SQLite della cache di parsing (riusata tra esecuzioni)")
+    parser.add_argument("--shard-bytes", type=int, default=config.ingest_shard_bytes,
+                        help="file oltre questa dimensione sono divisi in shard tramite indice a offset")
+    parser.add_argument("--emit-ddl", action="store_true",
+                        help="scrive anche le CREATE TABLE Snowflake dei layer ST/ODS (richiede --source-db)")
+    parser.add_argument("--metrics", default=config.ingest_metrics_path, metavar="PATH",
+                        help="metriche a fine esecuzione: JSON se PATH termina in .json, altrimenti OpenMetrics")
+    args = parser.parse_args(argv)
+    if args.emit_ddl and not args.source_db:
+        parser.error("--emit-ddl richiede --source-db")
+    configure_logging()
+    stats = run(args.input_dir, args.output_dir, args.workers, args.chunksize, args.source_db, args.pattern,
+                args.cache, args.emit_ddl, args.shard_bytes, args.metrics)
+    print(stats)
+
+
+if __name__ == '__main__':
+    main()
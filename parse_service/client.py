@@ -0,0 +1,126 @@
+"""
+Sviluppatore: Antonio Nunziante
+Client sincrono del parse server (solo libreria standard).
+
+Uso:
+    from parse_service.client import ParseClient
+
+    with ParseClient("./run/parse_server.sock") as client:
+        table = client.parse(ddl)                           # DDLInfo
+        tables = client.parse_many(ddls, "sql_server")      # SnowflakeExtend, in un solo round trip
+        print(client.stats())
+"""
+
+import socket
+
+from parse_service.protocol import (
+    HEADER_SIZE,
+    ProtocolError,
+    decode_body,
+    encode_frame,
+    frame_length,
+    parse_address,
+)
+
+
+class ParseError(Exception):
+    """Errore di parsing (o di richiesta) restituito dal server; status e' l'esito di parse_bounded."""
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class ParseClient:
+    def __init__(self, address, timeout: float = 60.0):
+        self.address = address
+        self.timeout = timeout
+        self._sock = None
+        self._next_id = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def connect(self):
+        if self._sock is None:
+            kind, target = parse_address(self.address)
+            if kind == 'unix':
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            else:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(target)
+            except OSError:
+                sock.close()
+                raise
+            self._sock = sock
+        return self
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    # -------------------------
+    # TRASPORTO
+    # -------------------------
+    def _recv_exactly(self, n: int) -> bytes:
+        chunks = []
+        while n:
+            chunk = self._sock.recv(n)
+            if not chunk:
+                raise ConnectionError("connessione chiusa dal parse server")
+            chunks.append(chunk)
+            n -= len(chunk)
+        return b"".join(chunks)
+
+    def request(self, op: str, **params):
+        """Invia una richiesta e ritorna il campo result; ParseError se ok e' falso."""
+        self.connect()
+        self._next_id += 1
+        message = dict(params, id=self._next_id, op=op)
+        try:
+            self._sock.sendall(encode_frame(message))
+            response = decode_body(self._recv_exactly(frame_length(self._recv_exactly(HEADER_SIZE))))
+        except (OSError, ProtocolError):
+            # stream in stato indefinito: la prossima richiesta riapre la connessione
+            self.close()
+            raise
+        if response.get('id') != message['id']:
+            self.close()
+            raise ProtocolError(f"risposta {response.get('id')} alla richiesta {message['id']}")
+        if not response.get('ok'):
+            raise ParseError(response.get('error'), response.get('status'))
+        return response.get('result')
+
+    # -------------------------
+    # API
+    # -------------------------
+    def parse(self, ddl: str, source_db: str = None) -> dict:
+        """Una tabella: identita', campi e righe colonna (con campi Snowflake se source_db)."""
+        return self.request('parse', ddl=ddl, source_db=source_db)
+
+    def parse_many(self, ddls, source_db: str = None) -> list:
+        """
+        Piu' DDL in un solo round trip. Ogni elemento e' {"ok": true, "status": "ok",
+        "result": ...} oppure {"ok": false, "status": ..., "error": ...}: un errore
+        non interrompe gli altri.
+        """
+        return self.request('parse_many', ddls=list(ddls), source_db=source_db)
+
+    def stats(self) -> dict:
+        return self.request('stats')
+
+    def ping(self) -> bool:
+        return self.request('ping') == 'pong'
+
+
+def rows_as_dicts(result: dict) -> list:
+    """Righe di una tabella restituita dal server come lista di dizionari (stile to_dict())."""
+    identity = result['table']
+    fields = result['fields']
+    return [dict(identity, **dict(zip(fields, row))) for row in result['rows']]
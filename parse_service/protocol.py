@@ -0,0 +1,65 @@
+"""
+Sviluppatore: Antonio Nunziante
+Protocollo del parse server: frame JSON con prefisso di lunghezza.
+
+Ogni messaggio e' un intero a 4 byte (big endian) con la lunghezza del
+corpo, seguito dal corpo JSON in UTF-8. Solo libreria standard: il client
+puo' essere usato da processi che non importano il parser.
+
+Richiesta:  {"id": 1, "op": "parse", "ddl": "...", "source_db": "sql_server"}
+            {"id": 2, "op": "parse_many", "ddls": [...], "source_db": null}
+            {"id": 3, "op": "stats"} | {"id": 4, "op": "ping"}
+Risposta:   {"id": 1, "ok": true, "result": {...}} | {"id": 1, "ok": false, "error": "..."}
+
+Una tabella e' restituita in forma compatta: identita' una sola volta,
+nomi dei campi una sola volta, righe colonna come liste:
+            {"table": {"database": ..., ...}, "fields": ["column_name", ...], "rows": [[...], ...]}
+"""
+
+import json
+import struct
+
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 64 * 2 ** 20
+DEFAULT_PORT = 8765
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode_frame(message: dict) -> bytes:
+    body = json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(len(body)) + body
+
+
+def decode_body(body: bytes) -> dict:
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        raise ProtocolError(f"frame JSON non valido: {e}") from None
+
+
+def frame_length(header: bytes, max_bytes: int = MAX_FRAME_BYTES) -> int:
+    (length,) = _HEADER.unpack(header)
+    if length > max_bytes:
+        raise ProtocolError(f"frame di {length} byte oltre il limite di {max_bytes}")
+    return length
+
+
+HEADER_SIZE = _HEADER.size
+
+
+def parse_address(address):
+    """
+    Indirizzo del server: path di un socket Unix (contiene '/' o finisce per
+    .sock), "host:port", ":port" o tupla (host, port).
+    Ritorna ('unix', path) oppure ('tcp', (host, port)).
+    """
+    if isinstance(address, tuple):
+        return 'tcp', (address[0] or "127.0.0.1", int(address[1]))
+    address = str(address)
+    if "/" in address or address.endswith(".sock"):
+        return 'unix', address
+    host, _, port = address.rpartition(":")
+    return 'tcp', (host or "127.0.0.1", int(port or DEFAULT_PORT))
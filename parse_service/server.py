@@ -0,0 +1,401 @@
+"""
+Sviluppatore: Antonio Nunziante
+Parse server residente: socket Unix o TCP locale, pool di worker caldi.
+
+I processi del pool importano parser, pandas e type map una sola volta
+all'avvio (init_worker): una richiesta paga solo il parsing, non l'avvio
+dell'interprete e gli import.
+
+Le DDL in arrivo (da piu' connessioni o da una parse_many) entrano in una
+coda; il batcher le raggruppa in micro-batch (al massimo server_max_batch
+DDL o server_max_delay_ms di attesa) e ne invia uno per worker libero.
+Dentro un batch la conversione Snowflake e' eseguita una volta per
+source_db su tutte le tabelle (convert_catalog), come nell'ingestione
+massiva.
+
+L'operazione "stats" espone profondita' della coda, batch in corso,
+dimensione media dei batch e percentili di latenza.
+
+Uso:
+    python -m parse_service.server [--address ./run/parse_server.sock | 127.0.0.1:8765]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from mainconfig import config
+from mainconfig.log_setup import configure_logging, flush_debug_buffer
+from parse_service.protocol import (
+    HEADER_SIZE,
+    ProtocolError,
+    decode_body,
+    encode_frame,
+    frame_length,
+    parse_address,
+)
+from parser_core.bounded_parse import ERROR, OK, parse_bounded
+from parser_core.ddl_records import COLUMN_FIELDS, TABLE_FIELDS
+from parser_core.ddl_templates import TemplateCache
+from parser_core.info_ddl_oop import DDLInfo
+from snowflake.snowflake_conf import AVAL_MAP_SNOW
+
+logger = logging.getLogger("parse_server")
+
+SNOWFLAKE_FIELDS = (config.add_field_dtype, config.add_field_length, config.add_field_upper)
+_WARM_DDL = "CREATE TABLE dbo.warmup (id INT NOT NULL, nome VARCHAR(10), PRIMARY KEY (id))"
+# source_db ammessi: le type map compilate (compile_type_map) restano in cache per tutta la vita del worker
+SOURCE_DBS = frozenset(AVAL_MAP_SNOW["snowflake"])
+
+
+# -------------------------
+# WORKER
+# -------------------------
+_templates = None
+
+
+def init_worker(warm_sources=()):
+    """Inizializzatore dei worker: logging, import e cache calde prima della prima richiesta."""
+    global _templates
+    configure_logging()
+    # tabelle con la stessa forma parsate una volta per worker (parser_core/ddl_templates.py)
+    _templates = TemplateCache() if config.template_dedup else None
+    DDLInfo(_WARM_DDL).table_meta
+    if warm_sources:
+        from snowflake.Snowflake_extension_engine import convert_catalog
+        meta = DDLInfo(_WARM_DDL).table_meta
+        for source_db in warm_sources:
+            convert_catalog([meta], source_db)
+
+
+def _warm():
+    return os.getpid()
+
+
+def _blank_nan(value):
+    # add_length usa NaN per "nessuna lunghezza": non serializzabile in JSON
+    return '' if value != value else value
+
+
+def _none_nan(value):
+    # le colonne categoriche trasformano None (foreign_table, foreign_key) in NaN:
+    # stesso valore delle righe senza source_db
+    return None if value != value else value
+
+
+def _table_result(meta, rows=None) -> dict:
+    return {
+        'table': dict(zip(TABLE_FIELDS, meta.identity)),
+        'fields': COLUMN_FIELDS + (SNOWFLAKE_FIELDS if rows is not None else ()),
+        'rows': meta.columns if rows is None else rows,
+    }
+
+
+def _convert(metas: list, source_db: str) -> list:
+    """Righe Snowflake per ogni tabella, con una sola conversione per tutte."""
+    from snowflake.Snowflake_extension_engine import convert_catalog
+    df = convert_catalog(metas, source_db)
+    fixes = (_none_nan,) * len(COLUMN_FIELDS) + (_blank_nan,) * len(SNOWFLAKE_FIELDS)
+    rows = [
+        [fix(v) for fix, v in zip(fixes, row)]
+        for row in df[list(COLUMN_FIELDS + SNOWFLAKE_FIELDS)].itertuples(index=False, name=None)
+    ]
+    tables = []
+    start = 0
+    for meta in metas:
+        end = start + len(meta.columns)
+        tables.append(rows[start:end])
+        start = end
+    return tables
+
+
+def parse_batch(items: list) -> list:
+    """
+    Worker: items e' una lista di (ddl, source_db). Ritorna, nello stesso
+    ordine, (True, risultato, "ok") oppure (False, messaggio d'errore, esito)
+    con l'esito di parse_bounded (too_large, timeout, error).
+    """
+    results = [None] * len(items)
+    pending = {}        # source_db -> [(posizione, TableMeta)]
+    parser = DDLInfo if _templates is None else _templates.parse
+    for i, (ddl, source_db) in enumerate(items):
+        # budget di dimensione e tempo: una DDL anomala non blocca il worker e il resto del batch
+        result = parse_bounded(ddl, parser=parser, ddl_name=f"richiesta {i}")
+        if not result.ok:
+            results[i] = (False, result.message, result.status)
+            continue
+        meta = result.table
+        if not source_db:
+            results[i] = (True, _table_result(meta), OK)
+        elif not meta.columns:
+            # come SnowflakeExtend: una tabella senza colonne non e' convertibile
+            results[i] = (False, "ValueError: DataFrame vuoto: impossibile inizializzare SnowflakeExtend", ERROR)
+            logger.error("|parse_batch| richiesta %d: tabella senza colonne: %s", i, meta.identity)
+            flush_debug_buffer(f"parse_batch: tabella senza colonne (richiesta {i})")
+        else:
+            pending.setdefault(source_db, []).append((i, meta))
+    for source_db, entries in pending.items():
+        try:
+            converted = _convert([meta for _, meta in entries], source_db)
+        except Exception as e:
+            logger.error("|parse_batch| conversione %s di %d tabelle fallita: %s", source_db, len(entries), e)
+            flush_debug_buffer(f"parse_batch: conversione {source_db} fallita")
+            for i, _ in entries:
+                results[i] = (False, f"{type(e).__name__}: {e}", ERROR)
+            continue
+        for (i, meta), rows in zip(entries, converted):
+            results[i] = (True, _table_result(meta, rows), OK)
+    return results
+
+
+# -------------------------
+# STATISTICHE
+# -------------------------
+class ServerStats:
+    def __init__(self, window: int = 4096):
+        self.started = time.time()
+        self.counters = {'connections': 0, 'requests': 0, 'tables': 0, 'errors': 0, 'batches': 0}
+        # latenze (ms) delle ultime richieste, dalla ricezione alla risposta
+        self.latencies = deque(maxlen=window)
+
+    def snapshot(self, queue_depth: int, in_flight: int) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3) if latencies else 0.0
+
+        batches = self.counters['batches']
+        items = self.counters['tables'] + self.counters['errors']
+        return dict(
+            self.counters,
+            queue_depth=queue_depth,
+            batches_in_flight=in_flight,
+            mean_batch_size=round(items / batches, 2) if batches else 0.0,
+            latency_ms={'p50': percentile(0.5), 'p95': percentile(0.95), 'p99': percentile(0.99),
+                        'max': round(latencies[-1], 3) if latencies else 0.0, 'window': len(latencies)},
+            uptime_s=round(time.time() - self.started, 1),
+        )
+
+
+# -------------------------
+# SERVER
+# -------------------------
+class ParseServer:
+    def __init__(self, workers: int = None, max_batch: int = None, max_delay_ms: float = None,
+                 warm_sources=None):
+        self.workers = workers or config.server_workers or os.cpu_count()
+        self.max_batch = max_batch or config.server_max_batch
+        self.max_delay = (config.server_max_delay_ms if max_delay_ms is None else max_delay_ms) / 1000
+        self.warm_sources = tuple(config.server_warm_sources if warm_sources is None else warm_sources)
+        self.stats = ServerStats()
+        self._pool = None
+        self._queue = None
+        self._slots = None
+        self._in_flight = 0
+        self._server = None
+        self._batcher = None
+        self._unix_path = None
+
+    # -------------------------
+    # CICLO DI VITA
+    # -------------------------
+    async def start(self, address=None):
+        kind, target = parse_address(address or config.server_address)
+        loop = asyncio.get_running_loop()
+        self._pool = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=(self.warm_sources,))
+        # i processi eseguono init_worker all'avvio: si accettano richieste solo a pool caldo
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _warm) for _ in range(self.workers)))
+        self._queue = asyncio.Queue()
+        # al massimo un batch per worker: mentre i worker sono occupati le richieste si accumulano
+        self._slots = asyncio.Semaphore(self.workers)
+        self._batcher = asyncio.create_task(self._batch_loop())
+        if kind == 'unix':
+            os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+            if os.path.exists(target):
+                os.unlink(target)
+            self._server = await asyncio.start_unix_server(self._handle, path=target)
+            self._unix_path = target
+        else:
+            self._server = await asyncio.start_server(self._handle, host=target[0], port=target[1])
+        logger.info("|start| parse server su %s:%s, %d worker", kind, target, self.workers)
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._batcher is not None:
+            self._batcher.cancel()
+            self._batcher = None
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        if self._unix_path and os.path.exists(self._unix_path):
+            os.unlink(self._unix_path)
+        logger.info("|close| parse server fermato: %s", self.snapshot())
+
+    async def serve(self, address=None):
+        """Avvia il server e resta in ascolto fino a SIGINT/SIGTERM."""
+        await self.start(address)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        try:
+            await stop.wait()
+        finally:
+            await self.close()
+
+    def snapshot(self) -> dict:
+        return self.stats.snapshot(self._queue.qsize() if self._queue else 0, self._in_flight)
+
+    # -------------------------
+    # MICRO-BATCHING
+    # -------------------------
+    def submit(self, ddl: str, source_db: str = None) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((ddl, source_db or None, future))
+        return future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+            self._in_flight += 1
+            self.stats.counters['batches'] += 1
+            asyncio.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: list):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self._pool, parse_batch, [(ddl, db) for ddl, db, _ in batch])
+        except Exception as e:
+            logger.error("|_run_batch| batch di %d DDL fallito: %s", len(batch), e)
+            results = [(False, f"{type(e).__name__}: {e}", ERROR)] * len(batch)
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    # -------------------------
+    # CONNESSIONI
+    # -------------------------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats.counters['connections'] += 1
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(HEADER_SIZE)
+                except asyncio.IncompleteReadError:
+                    break
+                start = time.perf_counter()
+                try:
+                    request = decode_body(await reader.readexactly(frame_length(header)))
+                except ProtocolError as e:
+                    # lunghezza o JSON non validi: lo stream non e' piu' allineato
+                    writer.write(encode_frame({'id': None, 'ok': False, 'error': str(e)}))
+                    await writer.drain()
+                    break
+                response = await self._dispatch(request)
+                writer.write(encode_frame(response))
+                await writer.drain()
+                self.stats.counters['requests'] += 1
+                self.stats.latencies.append((time.perf_counter() - start) * 1000)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _invalid(op, request: dict) -> Optional[str]:
+        """
+        Motivo per cui i campi della richiesta non sono validi, None se lo
+        sono. Un campo errato deve fallire solo la sua richiesta, non l'intero
+        micro-batch che la conterrebbe.
+        """
+        source_db = request.get('source_db')
+        if source_db is not None and not isinstance(source_db, str):
+            return f"source_db deve essere una stringa o null, ricevuto {type(source_db).__name__}"
+        if source_db and source_db not in SOURCE_DBS:
+            return f"source_db sconosciuto: {source_db!r} (ammessi: {', '.join(sorted(SOURCE_DBS))})"
+        if op == 'parse' and not isinstance(request.get('ddl'), str):
+            return f"ddl deve essere una stringa, ricevuto {type(request.get('ddl')).__name__}"
+        if op == 'parse_many':
+            ddls = request.get('ddls')
+            if not isinstance(ddls, list) or not all(isinstance(ddl, str) for ddl in ddls):
+                return "ddls deve essere una lista di stringhe"
+        return None
+
+    async def _dispatch(self, request: dict) -> dict:
+        if not isinstance(request, dict):
+            # JSON valido ma non un oggetto: il frame e' stato letto per intero, la connessione resta valida
+            return {'id': None, 'ok': False,
+                    'error': f"richiesta non valida: atteso un oggetto JSON, ricevuto {type(request).__name__}"}
+        request_id = request.get('id')
+        op = request.get('op')
+        source_db = request.get('source_db')
+        if op in ('parse', 'parse_many'):
+            invalid = self._invalid(op, request)
+            if invalid is not None:
+                return {'id': request_id, 'ok': False, 'error': f"richiesta non valida: {invalid}"}
+        if op == 'parse':
+            ok, result, status = await self.submit(request['ddl'], source_db)
+            self._count(ok)
+            return {'id': request_id, 'ok': ok, 'status': status, ('result' if ok else 'error'): result}
+        if op == 'parse_many':
+            futures = [self.submit(ddl, source_db) for ddl in request['ddls']]
+            results = await asyncio.gather(*futures)
+            for ok, _, _ in results:
+                self._count(ok)
+            return {'id': request_id, 'ok': True,
+                    'result': [{'ok': ok, 'status': status, ('result' if ok else 'error'): r}
+                               for ok, r, status in results]}
+        if op == 'stats':
+            return {'id': request_id, 'ok': True, 'result': self.snapshot()}
+        if op == 'ping':
+            return {'id': request_id, 'ok': True, 'result': 'pong'}
+        return {'id': request_id, 'ok': False, 'error': f"operazione sconosciuta: {op!r}"}
+
+    def _count(self, ok: bool):
+        self.stats.counters['tables' if ok else 'errors'] += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse server DDL residente")
+    parser.add_argument("--address", default=config.server_address,
+                        help="socket Unix (path) oppure host:port per TCP locale")
+    parser.add_argument("--workers", type=int, default=config.server_workers)
+    parser.add_argument("--max-batch", type=int, default=config.server_max_batch)
+    parser.add_argument("--max-delay-ms", type=float, default=config.server_max_delay_ms)
+    args = parser.parse_args(argv)
+    configure_logging()
+    server = ParseServer(args.workers, args.max_batch, args.max_delay_ms)
+    asyncio.run(server.serve(args.address))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
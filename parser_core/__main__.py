@@ -0,0 +1,127 @@
+"""
+Sviluppatore: Antonio Nunziante
+CLI di parsing in streaming: legge uno o piu' file DDL (o stdin) e scrive
+su stdout un record per colonna (o per tabella) in NDJSON o CSV, man mano
+che ogni CREATE TABLE viene parsata. Nessun DataFrame e nessuna dipendenza
+da pandas: memoria costante e primo record in pochi millisecondi.
+
+Uso:
+    python -m parser_core dump.sql altro.sql > colonne.ndjson
+    cat dump.sql | python -m parser_core --format csv --per table
+    python -m parser_core dump.sql --metrics metrics.prom > colonne.ndjson
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+from parser_core.ddl_records import ROW_FIELDS, TABLE_FIELDS
+from parser_core.ddl_stream import iter_statements
+from parser_core.info_ddl_oop import DDLInfo
+from parser_core.metrics import METRICS
+
+SOURCE_FIELDS = ('source_file', 'line')
+TABLE_SUMMARY_FIELDS = TABLE_FIELDS + ('column_count', 'primary_key', 'column_names')
+
+
+def _table_records(meta, per: str, prefix: tuple):
+    if per == 'column':
+        return [prefix + row for row in meta.iter_rows()]
+    names = [c.column_name for c in meta.columns]
+    primary_key = [c.column_name for c in meta.columns if c.is_key == 'Y']
+    return [prefix + meta.identity + (len(names), ",".join(primary_key), ",".join(names))]
+
+
+class _NDJSONWriter:
+    def __init__(self, out, fields):
+        self.out = out
+        self.fields = fields
+
+    def write(self, records):
+        fields = self.fields
+        self.out.write("".join(json.dumps(dict(zip(fields, r)), ensure_ascii=False) + "\n" for r in records))
+
+
+class _CSVWriter:
+    def __init__(self, out, fields, header: bool = True):
+        self.writer = csv.writer(out, lineterminator="\n")
+        if header:
+            self.writer.writerow(fields)
+
+    def write(self, records):
+        self.writer.writerows(records)
+
+
+def _sources(paths):
+    # nessun file o "-": stdin
+    for path in paths or ['-']:
+        if path == '-':
+            yield '<stdin>', sys.stdin
+        else:
+            yield path, path
+
+
+def run(paths, out, fmt: str = 'ndjson', per: str = 'column', with_source: bool = False,
+        header: bool = True, encoding: str = "utf-8-sig") -> dict:
+    """Scrive i record su out e ritorna le statistiche (tabelle, record, errori)."""
+    fields = (SOURCE_FIELDS if with_source else ()) + (ROW_FIELDS if per == 'column' else TABLE_SUMMARY_FIELDS)
+    writer = _NDJSONWriter(out, fields) if fmt == 'ndjson' else _CSVWriter(out, fields, header)
+    stats = {'tables': 0, 'records': 0, 'errors': 0}
+    for name, source in _sources(paths):
+        try:
+            for statement in iter_statements(source, encoding):
+                try:
+                    meta = DDLInfo(statement.text, name).table_meta
+                except Exception as e:
+                    stats['errors'] += 1
+                    METRICS.inc('failures', reason='error')
+                    print(f"{name}:{statement.line}: {type(e).__name__}: {e}", file=sys.stderr)
+                    continue
+                records = _table_records(meta, per, (name, statement.line) if with_source else ())
+                writer.write(records)
+                # un flush per tabella: i record arrivano a valle appena parsati
+                out.flush()
+                stats['tables'] += 1
+                stats['records'] += len(records)
+        except OSError as e:
+            if isinstance(e, BrokenPipeError):
+                raise
+            stats['errors'] += 1
+            METRICS.inc('failures', reason='io')
+            print(f"{name}: {e}", file=sys.stderr)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m parser_core",
+                                     description="Parsing DDL in streaming verso stdout (NDJSON/CSV)")
+    parser.add_argument("paths", nargs="*", help="file DDL; nessuno o '-' per stdin")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--per", choices=("column", "table"), default="column",
+                        help="un record per colonna (default) o per tabella")
+    parser.add_argument("--with-source", action="store_true", help="aggiunge source_file e line a ogni record")
+    parser.add_argument("--no-header", action="store_true", help="CSV senza riga di intestazione")
+    parser.add_argument("--encoding", default="utf-8-sig")
+    parser.add_argument("--stats", action="store_true", help="statistiche finali su stderr")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="metriche a fine esecuzione: JSON se PATH termina in .json, altrimenti OpenMetrics")
+    args = parser.parse_args(argv)
+    try:
+        stats = run(args.paths, sys.stdout, args.format, args.per, args.with_source, not args.no_header,
+                    args.encoding)
+    except BrokenPipeError:
+        # consumatore chiuso (es. | head): uscita silenziosa
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
+    if args.stats:
+        print(json.dumps(stats), file=sys.stderr)
+    if args.metrics:
+        METRICS.write(args.metrics)
+    return 1 if stats['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Sviluppatore: Antonio Nunziante
+Parsing con budget: dimensione e tempo massimi per istruzione.
+
+parse_bounded non solleva eccezioni e non resta bloccato: ritorna sempre un
+ParseResult con esito (ok, too_large, timeout, error), messaggio, numero di
+caratteri e tempo impiegato. Il limite di tempo e' applicato dal lexer
+(scan_deadline), quindi vale anche per parser composti come
+ParseCache.parse o SnowflakeExtend.
+
+La scansione e' lineare nella dimensione dell'input (verificato dal corpus
+di casi peggiori in benchmarks/worst_case.py): il budget di tempo protegge
+il batch da input enormi, non da backtracking.
+"""
+
+import logging
+import time
+from typing import NamedTuple, Optional
+
+from mainconfig import config
+from mainconfig.log_setup import flush_debug_buffer
+from parser_core.ddl_lexer import ScanTimeout, scan_deadline
+from parser_core.ddl_records import TableMeta
+from parser_core.info_ddl_oop import DDLInfo
+from parser_core.metrics import METRICS
+
+logger = logging.getLogger("info_DDL_oop")
+
+OK = "ok"
+TOO_LARGE = "too_large"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+
+class ParseBudget(NamedTuple):
+    max_chars: Optional[int] = None         # None = nessun limite
+    max_seconds: Optional[float] = None
+
+
+def default_budget() -> ParseBudget:
+    return ParseBudget(config.parse_max_chars, config.parse_max_seconds)
+
+
+class ParseResult(NamedTuple):
+    status: str
+    table: Optional[TableMeta]      # None se status != ok
+    parsed: object                  # istanza restituita dal parser (DDLInfo, SnowflakeExtend, ...) o None
+    message: str
+    chars: int
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return self.status == OK
+
+    @property
+    def error(self) -> str:
+        return f"{self.status}: {self.message}"
+
+
+def parse_bounded(ddl: str, budget: ParseBudget = None, parser=DDLInfo, ddl_name=None) -> ParseResult:
+    """
+    parser(ddl).table_meta entro il budget (default: config.parse_max_chars /
+    config.parse_max_seconds). parser e' un costruttore o una funzione che
+    ritorna un oggetto con table_meta (es. ParseCache.parse).
+    """
+    budget = budget or default_budget()
+    chars = len(ddl)
+    if budget.max_chars is not None and chars > budget.max_chars:
+        logger.error("|parse_bounded| %s: %d caratteri oltre il limite di %d", ddl_name, chars, budget.max_chars)
+        METRICS.inc('failures', reason=TOO_LARGE)
+        return ParseResult(TOO_LARGE, None, None, f"{chars} caratteri oltre il limite di {budget.max_chars}", chars, 0.0)
+    start = time.perf_counter()
+    try:
+        with scan_deadline(budget.max_seconds):
+            parsed = parser(ddl)
+            table = parsed.table_meta
+    except ScanTimeout as e:
+        seconds = time.perf_counter() - start
+        logger.error("|parse_bounded| %s: timeout dopo %.3f s (%s)", ddl_name, seconds, e)
+        flush_debug_buffer(f"parse_bounded: timeout {ddl_name}")
+        METRICS.inc('failures', reason=TIMEOUT)
+        return ParseResult(TIMEOUT, None, None, str(e), chars, seconds)
+    except Exception as e:
+        seconds = time.perf_counter() - start
+        logger.error("|parse_bounded| %s: %s: %s", ddl_name, type(e).__name__, e)
+        flush_debug_buffer(f"parse_bounded: errore {ddl_name}")
+        METRICS.inc('failures', reason=ERROR)
+        return ParseResult(ERROR, None, None, f"{type(e).__name__}: {e}", chars, seconds)
+    seconds = time.perf_counter() - start
+    if budget.max_seconds is not None and seconds > budget.max_seconds:
+        # superato fuori dalla scansione (costruzione dei record): stesso esito del timeout
+        logger.error("|parse_bounded| %s: %.3f s oltre il limite di %s s", ddl_name, seconds, budget.max_seconds)
+        flush_debug_buffer(f"parse_bounded: timeout {ddl_name}")
+        METRICS.inc('failures', reason=TIMEOUT)
+        return ParseResult(TIMEOUT, None, None, f"{seconds:.3f} s oltre il limite di {budget.max_seconds} s",
+                           chars, seconds)
+    return ParseResult(OK, table, parsed, "", chars, seconds)
@@ -0,0 +1,263 @@
+"""
+Sviluppatore: Antonio Nunziante
+Catalogo in memoria di molte tabelle con grafo delle foreign key indicizzato.
+
+Le tabelle sono indicizzate per nome qualificato (senza distinzione tra
+maiuscole e minuscole, come gli identificatori SQL non quotati) e per
+suffisso (schema.tabella, tabella): ogni FK viene risolta con lookup su
+dizionario verso tabella e colonna di destinazione. Il riferimento parziale
+(es. REFERENCES clienti) e' risolto prima nello stesso database/schema della
+tabella di partenza, poi su un suffisso univoco nel catalogo.
+
+Dal grafo risolto si ottengono i riferimenti pendenti (tabella o colonna
+inesistente) e un ordine di caricamento topologico (padri prima dei figli).
+"""
+
+import heapq
+import logging
+from functools import cached_property
+from typing import NamedTuple, Optional
+
+from parser_core.ddl_records import TableMeta
+
+logger = logging.getLogger("info_DDL_oop")
+
+# motivi di un riferimento non risolto
+MISSING_TABLE = 'missing_table'
+AMBIGUOUS_TABLE = 'ambiguous_table'
+MISSING_COLUMN = 'missing_column'
+
+
+class ForeignKeyRef(NamedTuple):
+    table: str                      # tabella che dichiara la FK (nome qualificato)
+    column: str
+    ref_table: str                  # riferimento come scritto nella DDL
+    ref_column: Optional[str]       # None: PK implicita della tabella referenziata
+    target_table: Optional[str]     # nome qualificato risolto
+    target_column: Optional[str]
+    problem: Optional[str]          # None se risolta, altrimenti MISSING_* / AMBIGUOUS_*
+
+    @property
+    def resolved(self) -> bool:
+        return self.problem is None
+
+
+def _key(name: str) -> str:
+    return name.casefold()
+
+
+class Catalog:
+    """
+    Catalogo di TableMeta (o istanze DDLInfo/SnowflakeExtend). Le risoluzioni
+    sono calcolate al primo accesso e invalidate da add().
+    """
+
+    def __init__(self, tables=()):
+        self._tables = {}           # chiave casefold -> TableMeta
+        self._suffixes = {}         # "schema.tabella" / "tabella" casefold -> set di chiavi
+        self._columns = {}          # chiave tabella -> ({colonna: ColumnMeta}, {colonna casefold: ColumnMeta})
+        self._primary_keys = {}     # chiave tabella -> colonne della PK, calcolate al primo uso
+        self.duplicates = []
+        self.extend(tables)
+
+    # -------------------------
+    # INGESTIONE E INDICI
+    # -------------------------
+    def add(self, table):
+        meta = table if isinstance(table, TableMeta) else table.table_meta
+        key = _key(meta.fully_qualified_table)
+        if key in self._tables:
+            # vince l'ultima definizione, come in un deploy sequenziale
+            self.duplicates.append(meta.fully_qualified_table)
+            logger.warning("|Catalog.add| tabella duplicata: %s", meta.fully_qualified_table)
+            self._columns.pop(key, None)
+            self._primary_keys.pop(key, None)
+        else:
+            for suffix in (f"{meta.schema_name}.{meta.table_name}" if meta.schema_name else None, meta.table_name):
+                if suffix:
+                    self._suffixes.setdefault(_key(suffix), set()).add(key)
+        self._tables[key] = meta
+        if 'foreign_keys' in self.__dict__:
+            self._invalidate()
+
+    def extend(self, tables):
+        for table in tables:
+            self.add(table)
+
+    def _invalidate(self):
+        for name in ('foreign_keys', 'dependencies', 'dependents', '_topological'):
+            self.__dict__.pop(name, None)
+
+    def __len__(self):
+        return len(self._tables)
+
+    def __iter__(self):
+        return iter(self._tables.values())
+
+    def __contains__(self, name: str) -> bool:
+        return _key(name) in self._tables
+
+    def __getitem__(self, name: str) -> TableMeta:
+        return self._tables[_key(name)]
+
+    def get(self, name: str, default=None):
+        return self._tables.get(_key(name), default)
+
+    def column(self, name: str, column_name: str):
+        """ColumnMeta della colonna (lookup esatto, poi senza distinzione maiuscole) o None."""
+        key = _key(name)
+        index = self._columns.get(key)
+        if index is None:
+            columns = self._tables[key].columns
+            folded = {}
+            for c in columns:
+                # a parita' di nome senza maiuscole vince la prima colonna
+                folded.setdefault(_key(c.column_name), c)
+            index = self._columns[key] = ({c.column_name: c for c in columns}, folded)
+        exact, folded = index
+        found = exact.get(column_name)
+        if found is None:
+            found = folded.get(_key(column_name))
+        return found
+
+    # -------------------------
+    # RISOLUZIONE
+    # -------------------------
+    def resolve_table(self, ref_table: str, from_table: TableMeta = None):
+        """
+        Chiave della tabella referenziata e problema (None se risolta).
+        I nomi parziali sono completati con database/schema di from_table.
+        """
+        ref_key = _key(ref_table)
+        if ref_key in self._tables:
+            return ref_key, None
+        parts = ref_table.split('.')
+        if from_table is not None and len(parts) < 3:
+            prefix = [from_table.database, from_table.schema_name][:3 - len(parts)]
+            candidate = _key('.'.join(p for p in prefix + parts if p))
+            if candidate in self._tables:
+                return candidate, None
+        if len(parts) >= 3:
+            return None, MISSING_TABLE
+        matches = self._suffixes.get(ref_key, ())
+        if len(matches) == 1:
+            return next(iter(matches)), None
+        return None, AMBIGUOUS_TABLE if matches else MISSING_TABLE
+
+    def _primary_key(self, key: str) -> list:
+        pk = self._primary_keys.get(key)
+        if pk is None:
+            pk = self._primary_keys[key] = [c.column_name for c in self._tables[key].columns if c.is_key == 'Y']
+        return pk
+
+    @cached_property
+    def foreign_keys(self) -> list:
+        """Tutte le FK del catalogo, ciascuna risolta verso tabella e colonna."""
+        refs = []
+        resolved = {}   # (riferimento, database, schema) -> (chiave, problema): molte FK verso le stesse tabelle
+        for meta in self._tables.values():
+            implicit = {}   # riferimento -> {colonna locale con PK implicita: posizione di dichiarazione}
+            for column in meta.columns:
+                if column.is_foreign == 'Y' and column.foreign_key is None:
+                    positions = implicit.setdefault(column.foreign_table, {})
+                    positions.setdefault(column.column_name, len(positions))
+            for column in meta.columns:
+                if column.is_foreign != 'Y':
+                    continue
+                lookup = (column.foreign_table, meta.database, meta.schema_name)
+                target = resolved.get(lookup)
+                if target is None:
+                    target = resolved[lookup] = self.resolve_table(column.foreign_table, meta)
+                target_key, problem = target
+                target_table = target_column = None
+                if target_key is not None:
+                    target_table = self._tables[target_key].fully_qualified_table
+                    if column.foreign_key is None:
+                        # PK implicita: colonne locali abbinate per posizione alla PK di destinazione
+                        # (piu' FK verso la stessa tabella si susseguono a blocchi di len(pk) colonne)
+                        pk = self._primary_key(target_key)
+                        local = implicit[column.foreign_table]
+                        if len(pk) == 1:
+                            target_column = pk[0]
+                        elif pk and len(local) % len(pk) == 0:
+                            target_column = pk[local[column.column_name] % len(pk)]
+                        else:
+                            problem = MISSING_COLUMN
+                    else:
+                        found = self.column(target_key, column.foreign_key)
+                        if found is None:
+                            problem = MISSING_COLUMN
+                        else:
+                            target_column = found.column_name
+                refs.append(ForeignKeyRef(
+                    meta.fully_qualified_table, column.column_name, column.foreign_table, column.foreign_key,
+                    target_table, target_column, problem
+                ))
+        return refs
+
+    def dangling(self) -> list:
+        """FK verso tabelle o colonne non presenti nel catalogo (o ambigue)."""
+        return [ref for ref in self.foreign_keys if ref.problem is not None]
+
+    @cached_property
+    def dependencies(self) -> dict:
+        """tabella -> set delle tabelle referenziate (auto-riferimenti esclusi)."""
+        graph = {meta.fully_qualified_table: set() for meta in self._tables.values()}
+        for ref in self.foreign_keys:
+            if ref.target_table is not None and ref.target_table != ref.table:
+                graph[ref.table].add(ref.target_table)
+        return graph
+
+    @cached_property
+    def dependents(self) -> dict:
+        """tabella -> set delle tabelle che la referenziano."""
+        graph = {name: set() for name in self.dependencies}
+        for name, parents in self.dependencies.items():
+            for parent in parents:
+                graph[parent].add(name)
+        return graph
+
+    @cached_property
+    def _topological(self) -> tuple:
+        # (ordine delle tabelle acicliche, tabelle in cicli), calcolato una volta
+        pending = {name: len(parents) for name, parents in self.dependencies.items()}
+        dependents = self.dependents
+        ready = [name for name, count in pending.items() if not count]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            name = heapq.heappop(ready)
+            order.append(name)
+            for child in dependents[name]:
+                pending[child] -= 1
+                if not pending[child]:
+                    heapq.heappush(ready, child)
+        cyclic = sorted(name for name, count in pending.items() if count) if len(order) < len(pending) else []
+        return order, cyclic
+
+    def load_order(self, strict: bool = False) -> list:
+        """
+        Ordine topologico di caricamento: ogni tabella dopo quelle che
+        referenzia; a parita' di livello l'ordine e' alfabetico.
+        Le tabelle coinvolte in cicli sono accodate alla fine (o ValueError
+        con strict=True).
+        """
+        order, cyclic = self._topological
+        if cyclic:
+            if strict:
+                raise ValueError(f"Dipendenze cicliche tra {len(cyclic)} tabelle: {cyclic[:10]}")
+            logger.warning("|Catalog.load_order| %d tabelle in dipendenze cicliche", len(cyclic))
+        return order + cyclic
+
+    def cycles(self) -> list:
+        """Tabelle che non possono essere ordinate per dipendenze cicliche."""
+        return list(self._topological[1])
+
+    def report(self) -> dict:
+        return {
+            'tables': len(self._tables),
+            'foreign_keys': len(self.foreign_keys),
+            'dangling': len(self.dangling()),
+            'cyclic': len(self._topological[1]),
+            'duplicates': len(self.duplicates),
+        }
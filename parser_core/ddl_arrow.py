@@ -0,0 +1,184 @@
+"""
+Sviluppatore: Antonio Nunziante
+Esportazione dei metadati in Apache Arrow e Parquet.
+
+I record (TableMeta) sono convertiti direttamente in RecordBatch Arrow,
+senza passare da dict o DataFrame. Le colonne identificative ripetute
+(identita' tabella, datatype, lunghezza, flag, riferimenti FK) sono
+dictionary-encoded; column_name resta una colonna stringa.
+
+write_parquet_dataset scrive molte tabelle in un dataset Parquet
+partizionato per database/schema (stile hive) a blocchi di tabelle: la
+memoria dipende dal blocco, non dal catalogo. I RecordBatch sono costruiti
+per partizione, cosi' i dizionari di ogni file contengono solo i valori
+della propria partizione.
+
+pyarrow e' una dipendenza opzionale, importata solo da queste funzioni.
+"""
+
+import logging
+from itertools import groupby, islice
+from operator import attrgetter
+
+from mainconfig import config
+from parser_core.ddl_records import COLUMN_FIELDS, ROW_FIELDS, TABLE_FIELDS, TableMeta
+
+logger = logging.getLogger("info_DDL_oop")
+
+# colonne dictionary-encoded (tutte tranne column_name)
+DICTIONARY_FIELDS = tuple(f for f in ROW_FIELDS if f != 'column_name')
+SNOWFLAKE_FIELDS = (config.add_field_dtype, config.add_field_length, config.add_field_upper)
+PARTITION_FIELDS = ('database', 'schema_name')
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("pyarrow non installato: necessario per l'export Arrow/Parquet (pip install pyarrow)") from None
+    return pyarrow
+
+
+def arrow_schema(snowflake: bool = False):
+    pa = _pyarrow()
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    fields = [pa.field(f, dictionary if f in DICTIONARY_FIELDS else pa.string()) for f in ROW_FIELDS]
+    if snowflake:
+        fields += [
+            pa.field(config.add_field_dtype, dictionary),
+            pa.field(config.add_field_length, dictionary),
+            pa.field(config.add_field_upper, pa.string()),
+        ]
+    return pa.schema(fields)
+
+
+def _length(value):
+    # la lunghezza e' una stringa ("10,2"); 0 / NaN / '' indicano lunghezza assente
+    if value is None or value != value or value == '' or value == 0:
+        return None
+    return str(value)
+
+
+def _as_table_meta(table) -> TableMeta:
+    return table if isinstance(table, TableMeta) else table.table_meta
+
+
+def metas_to_record_batch(metas, snowflake_columns: dict = None):
+    """
+    Un RecordBatch per le tabelle in input (TableMeta o DDLInfo).
+    snowflake_columns: valori add_dtype/add_length/upper_col_name gia'
+    calcolati, nello stesso ordine delle colonne.
+    """
+    pa = _pyarrow()
+    metas = [_as_table_meta(t) for t in metas]
+    counts = [len(m.columns) for m in metas]
+    identity = {f: [] for f in TABLE_FIELDS}
+    for meta, n in zip(metas, counts):
+        for field, value in zip(TABLE_FIELDS, meta[:4]):
+            identity[field].extend([value] * n)
+    columns = [c for m in metas for c in m.columns]
+    values = dict(zip(COLUMN_FIELDS, (list(v) for v in zip(*columns)))) if columns else {f: [] for f in COLUMN_FIELDS}
+    values['length'] = [_length(v) for v in values['length']]
+    values.update(identity)
+    schema = arrow_schema(snowflake_columns is not None)
+    if snowflake_columns is not None:
+        values[config.add_field_dtype] = [None if v != v else v for v in snowflake_columns[config.add_field_dtype]]
+        values[config.add_field_length] = [_length(v) for v in snowflake_columns[config.add_field_length]]
+        values[config.add_field_upper] = list(snowflake_columns[config.add_field_upper])
+    arrays = []
+    for field in schema:
+        array = pa.array(values[field.name], pa.string())
+        arrays.append(array.dictionary_encode() if pa.types.is_dictionary(field.type) else array)
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def to_arrow_table(metas, snowflake_columns: dict = None):
+    pa = _pyarrow()
+    return pa.Table.from_batches([metas_to_record_batch(metas, snowflake_columns)])
+
+
+def _snowflake_columns(metas: list, source_db: str) -> dict:
+    from snowflake.Snowflake_extension_engine import convert_catalog
+    df = convert_catalog(metas, source_db)
+    return {f: df[f].tolist() for f in SNOWFLAKE_FIELDS}
+
+
+def _chunks(tables, batch_tables: int):
+    metas = (m for m in map(_as_table_meta, tables) if m.columns)
+    while True:
+        chunk = list(islice(metas, batch_tables))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _chunk_batch(chunk: list, source_db: str = None):
+    snowflake_columns = _snowflake_columns(chunk, source_db) if source_db else None
+    return metas_to_record_batch(chunk, snowflake_columns)
+
+
+def iter_record_batches(tables, source_db: str = None, batch_tables: int = 1000):
+    """RecordBatch a blocchi di batch_tables tabelle (con colonne Snowflake se source_db)."""
+    for chunk in _chunks(tables, batch_tables):
+        yield _chunk_batch(chunk, source_db)
+
+
+def _partition_batches(chunk: list, source_db: str, partition_fields):
+    """
+    Un RecordBatch per partizione del blocco: ogni file Parquet riceve
+    dizionari con i soli valori della propria partizione.
+    """
+    key = attrgetter(*partition_fields)
+    chunk = sorted(chunk, key=key)
+    snowflake_columns = _snowflake_columns(chunk, source_db) if source_db else None
+    start = 0
+    for _, group in groupby(chunk, key=key):
+        group = list(group)
+        end = start + sum(len(m.columns) for m in group)
+        part_columns = None
+        if snowflake_columns is not None:
+            part_columns = {f: values[start:end] for f, values in snowflake_columns.items()}
+        yield metas_to_record_batch(group, part_columns)
+        start = end
+
+
+def write_parquet_dataset(tables, root: str, source_db: str = None, batch_tables: int = 1000,
+                          partition_fields=PARTITION_FIELDS, compression: str = "zstd") -> dict:
+    """
+    Scrive le tabelle in input (TableMeta, DDLInfo o generatore come
+    iter_tables) in un dataset Parquet sotto root, partizionato per
+    database/schema (root/database=.../schema_name=.../part-N.parquet).
+    Con source_db vengono aggiunte le colonne di conversione Snowflake.
+    Le partizioni scritte vengono sostituite per intero (i file di una
+    scrittura precedente piu' grande non restano nel dataset); le partizioni
+    non presenti nell'input restano invariate.
+    """
+    pa = _pyarrow()
+    import pyarrow.dataset as ds
+
+    schema = arrow_schema(source_db is not None)
+    partition_fields = tuple(partition_fields or ())
+    stats = {'tables': 0, 'rows': 0, 'batches': 0}
+
+    def batches():
+        for chunk in _chunks(tables, batch_tables):
+            stats['tables'] += len(chunk)
+            parts = _partition_batches(chunk, source_db, partition_fields) if partition_fields \
+                else [_chunk_batch(chunk, source_db)]
+            for batch in parts:
+                stats['rows'] += batch.num_rows
+                stats['batches'] += 1
+                yield batch
+
+    partitioning = None
+    if partition_fields:
+        partitioning = ds.partitioning(pa.schema([schema.field(f) for f in partition_fields]), flavor="hive")
+    ds.write_dataset(
+        batches(), root, schema=schema, format="parquet", partitioning=partitioning,
+        basename_template="part-{i}.parquet", existing_data_behavior="delete_matching",
+        file_options=ds.ParquetFileFormat().make_write_options(compression=compression),
+        # i batch di una stessa partizione confluiscono in row group grandi
+        min_rows_per_group=1 << 16, max_rows_per_group=1 << 20,
+    )
+    logger.info("|write_parquet_dataset| %s -> %s", stats, root)
+    return stats
@@ -0,0 +1,102 @@
+"""
+Sviluppatore: Antonio Nunziante
+Costruzione colonnare di un unico DataFrame per molte tabelle.
+
+Invece di un DataFrame per tabella seguito da pd.concat, i valori vengono
+accumulati in array di colonna e il frame viene costruito una sola volta.
+Le colonne molto ripetute (identita' tabella, datatype, lunghezza, flag e
+riferimenti di chiave) sono categoriche: codici interi + un solo dizionario
+di valori; column_name resta una colonna stringa.
+"""
+
+import numpy as np
+import pandas as pd
+
+from parser_core.ddl_records import ROW_FIELDS, TABLE_FIELDS, TableMeta
+from parser_core.metrics import METRICS
+
+_FLAG_CATEGORIES = ['N', 'Y']
+_FLAG_CODES = {'N': 0, 'Y': 1}
+
+
+def _as_table_meta(table) -> TableMeta:
+    # accetta sia TableMeta che istanze DDLInfo/SnowflakeExtend
+    return table if isinstance(table, TableMeta) else table.table_meta
+
+
+def _code(index: dict, value) -> int:
+    code = index.get(value)
+    if code is None:
+        code = index[value] = len(index)
+    return code
+
+
+def _categorical(codes, index: dict) -> pd.Categorical:
+    # None (es. foreign_table assente) diventa il codice -1, cioe' valore mancante
+    missing = index.pop(None, None)
+    codes = np.asarray(codes, dtype=np.int32)
+    if missing is not None:
+        codes[codes == missing] = -1
+        codes[codes > missing] -= 1
+    return pd.Categorical.from_codes(codes, categories=pd.Index(list(index), dtype=object))
+
+
+def build_catalog_dataframe(tables) -> pd.DataFrame:
+    """
+    Un DataFrame con lo schema di DDLInfo.to_dataframe() per tutte le
+    tabelle in input (TableMeta o DDLInfo), nell'ordine ricevuto.
+    """
+    identity_index = [{} for _ in TABLE_FIELDS]
+    identity_codes = [[] for _ in TABLE_FIELDS]
+    counts = []
+    datatype_index = {}
+    datatype_codes = []
+    length_index = {}
+    length_codes = []
+    foreign_table_index = {}
+    foreign_table_codes = []
+    foreign_key_index = {}
+    foreign_key_codes = []
+    key_codes = []
+    foreign_codes = []
+    column_name = []
+
+    for table in tables:
+        meta = _as_table_meta(table)
+        columns = meta.columns
+        if not columns:
+            continue
+        counts.append(len(columns))
+        for index, codes, value in zip(identity_index, identity_codes, meta[:4]):
+            codes.append(_code(index, value))
+        names, dtypes, lengths, is_key, is_foreign, f_tables, f_keys = zip(*columns)
+        column_name.extend(names)
+        datatype_codes.extend(_code(datatype_index, d) for d in dtypes)
+        length_codes.extend(_code(length_index, v) for v in lengths)
+        foreign_table_codes.extend(_code(foreign_table_index, v) for v in f_tables)
+        foreign_key_codes.extend(_code(foreign_key_index, v) for v in f_keys)
+        key_codes.extend(_FLAG_CODES[k] for k in is_key)
+        foreign_codes.extend(_FLAG_CODES[f] for f in is_foreign)
+
+    if not counts:
+        return pd.DataFrame(columns=list(ROW_FIELDS))
+
+    # solo la costruzione del frame: il parsing delle tabelle in input ha le sue fasi
+    with METRICS.timer('dataframe_build'):
+        # codici tabella ripetuti per il numero di colonne di ciascuna tabella
+        repeats = np.asarray(counts, dtype=np.int64)
+        data = {
+            field: _categorical(np.repeat(np.asarray(codes, dtype=np.int32), repeats), index)
+            for field, codes, index in zip(TABLE_FIELDS, identity_codes, identity_index)
+        }
+        flags = pd.CategoricalDtype(_FLAG_CATEGORIES)
+        data.update({
+            'column_name': column_name,
+            'datatype': _categorical(datatype_codes, datatype_index),
+            'length': _categorical(length_codes, length_index),
+            'is_key': pd.Categorical.from_codes(np.asarray(key_codes, dtype=np.int8), dtype=flags),
+            'is_foreign': pd.Categorical.from_codes(np.asarray(foreign_codes, dtype=np.int8), dtype=flags),
+            'foreign_table': _categorical(foreign_table_codes, foreign_table_index),
+            'foreign_key': _categorical(foreign_key_codes, foreign_key_index),
+        })
+        return pd.DataFrame(data, columns=list(ROW_FIELDS))
@@ -0,0 +1,36 @@
+"""
+Sviluppatore: Antonio Nunziante
+Identificatori nelle DDL generate (ALTER di schema_diff, CREATE Snowflake).
+
+Un nome resta senza virgolette solo se e' un identificatore semplice e non
+e' una parola riservata Snowflake/ANSI; altrimenti viene racchiuso tra ""
+(con le virgolette interne raddoppiate). Il confronto con le parole
+riservate non distingue maiuscole e minuscole.
+"""
+
+import re
+
+_SIMPLE_IDENT = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*\Z")
+
+# parole riservate Snowflake e ANSI: come nomi di tabella o colonna vanno quotate
+RESERVED_WORDS = frozenset("""
+    ACCOUNT ALL ALTER AND ANY AS BETWEEN BY CASE CAST CHECK COLUMN CONNECT CONNECTION CONSTRAINT CREATE
+    CROSS CURRENT CURRENT_DATE CURRENT_TIME CURRENT_TIMESTAMP CURRENT_USER DATABASE DELETE DISTINCT DROP
+    ELSE EXISTS FALSE FOLLOWING FOR FOREIGN FROM FULL GRANT GROUP GSCLUSTER HAVING ILIKE IN INCREMENT
+    INNER INSERT INTERSECT INTO IS ISSUE JOIN LATERAL LEFT LIKE LOCALTIME LOCALTIMESTAMP MINUS NATURAL
+    NOT NULL OF ON OR ORDER ORGANIZATION PRIMARY QUALIFY REFERENCES REGEXP REVOKE RIGHT RLIKE ROW ROWS
+    SAMPLE SCHEMA SELECT SET SOME START TABLE TABLESAMPLE THEN TO TRIGGER TRUE TRY_CAST UNION UNIQUE
+    UPDATE USING VALUES VIEW WHEN WHENEVER WHERE WITH
+""".split())
+
+
+def quote_ident(name: str) -> str:
+    """Nome pronto per la DDL: tra "" se non e' semplice o e' una parola riservata."""
+    if _SIMPLE_IDENT.match(name) and name.upper() not in RESERVED_WORDS:
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+
+def quote_qualified(parts) -> str:
+    """db.schema.tabella dalle parti gia' separate (le parti vuote sono saltate)."""
+    return ".".join(quote_ident(part) for part in parts if part)
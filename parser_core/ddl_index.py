@@ -0,0 +1,181 @@
+"""
+Sviluppatore: Antonio Nunziante
+Indice persistente a offset di byte delle CREATE TABLE di un dump.
+
+Il file viene mappato in memoria (mmap) e scandito una sola volta con lo
+stesso splitter di iter_statements: per ogni CREATE TABLE l'indice salva
+offset di inizio/fine in byte e riga di inizio. L'indice e' scritto accanto
+al dump (<dump>.ddlidx) e riusato finche' dimensione e data di modifica del
+file non cambiano.
+
+I worker leggono solo le proprie istruzioni: seek sulla mappa, decodifica
+della sola fetta di byte e parsing. Nessuno legge il file intero in una
+stringa e piu' processi possono lavorare su shard diversi dello stesso file.
+"""
+
+import json
+import logging
+import mmap
+import os
+from typing import NamedTuple
+
+from parser_core.ddl_stream import DDLStatement, _StatementSplitter
+from parser_core.info_ddl_oop import DDLInfo
+
+logger = logging.getLogger("info_DDL_oop")
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".ddlidx"
+_BOM = b"\xef\xbb\xbf"
+
+
+class IndexEntry(NamedTuple):
+    start: int      # offset in byte del primo carattere dell'istruzione
+    end: int        # offset in byte del terminatore (';', GO) o fine file
+    line: int
+
+
+def _file_signature(path: str) -> dict:
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _scan_offsets(path: str, encoding: str) -> list:
+    """Scansione unica del file mappato: offset in byte di ogni CREATE TABLE."""
+    text_encoding = "utf-8" if encoding.lower().replace("_", "-") == "utf-8-sig" else encoding
+    entries = []
+    splitter = _StatementSplitter(track_spans=True)
+    line_offsets = {}       # riga -> (offset in byte, testo) per le righe di istruzioni aperte
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return entries
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offset = 0
+            if text_encoding != encoding and mm[:3] == _BOM:
+                mm.seek(3)
+                offset = 3
+            lineno = 0
+            for raw in iter(mm.readline, b""):
+                lineno += 1
+                # surrogateescape: la conversione colonna -> byte resta esatta anche con byte non validi
+                line = raw.decode(text_encoding, errors="surrogateescape")
+                line_offsets[lineno] = (offset, line)
+                splitter.feed(line, lineno)
+                if splitter.spans:
+                    entries.extend(_to_entries(splitter.spans, line_offsets, text_encoding, None))
+                    splitter.spans.clear()
+                if not (splitter.started and splitter.keep):
+                    # nessuna CREATE TABLE aperta: le righe lette non servono piu'
+                    line_offsets.clear()
+                elif next(iter(line_offsets)) < splitter.start_line:
+                    line_offsets = {k: v for k, v in line_offsets.items() if k >= splitter.start_line}
+                offset += len(raw)
+            splitter.close()
+            entries.extend(_to_entries(splitter.spans, line_offsets, text_encoding, offset))
+    return entries
+
+
+def _byte_pos(line_offsets: dict, position, encoding: str) -> int:
+    lineno, col = position
+    offset, line = line_offsets[lineno]
+    prefix = line[:col]
+    return offset + (col if prefix.isascii() else len(prefix.encode(encoding, errors="surrogateescape")))
+
+
+def _to_entries(spans, line_offsets: dict, encoding: str, eof: int) -> list:
+    return [
+        IndexEntry(
+            _byte_pos(line_offsets, (start_line, start_col), encoding),
+            eof if end is None else _byte_pos(line_offsets, end, encoding),
+            start_line,
+        )
+        for start_line, start_col, end in spans
+    ]
+
+
+class StatementIndex:
+    """Indice a offset di un dump: costruzione, persistenza e lettura per shard."""
+
+    def __init__(self, path: str, entries: list, encoding: str = "utf-8-sig"):
+        self.path = path
+        self.entries = entries
+        self.encoding = encoding
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def index_path(path: str) -> str:
+        return os.fspath(path) + INDEX_SUFFIX
+
+    @classmethod
+    def build(cls, path: str, encoding: str = "utf-8-sig") -> "StatementIndex":
+        entries = _scan_offsets(path, encoding)
+        logger.info("|StatementIndex.build| %s: %d CREATE TABLE indicizzate", path, len(entries))
+        return cls(path, entries, encoding)
+
+    def save(self, index_path: str = None):
+        index_path = index_path or self.index_path(self.path)
+        payload = dict(_file_signature(self.path), version=INDEX_VERSION, encoding=self.encoding,
+                       entries=[list(e) for e in self.entries])
+        tmp = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        # rename atomico: shard paralleli non leggono mai un indice parziale
+        os.replace(tmp, index_path)
+
+    @classmethod
+    def load(cls, path: str, index_path: str = None, encoding: str = "utf-8-sig"):
+        """Indice salvato se ancora valido per il file (dimensione, mtime, encoding), altrimenti None."""
+        index_path = index_path or cls.index_path(path)
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None
+        signature = _file_signature(path)
+        if (payload.get('version') != INDEX_VERSION or payload.get('encoding') != encoding
+                or any(payload.get(k) != v for k, v in signature.items())):
+            return None
+        return cls(path, [IndexEntry(*e) for e in payload['entries']], encoding)
+
+    # -------------------------
+    # LETTURA
+    # -------------------------
+    def shard(self, shard: int, shards: int) -> list:
+        """Blocco contiguo di istruzioni assegnato allo shard (0 <= shard < shards)."""
+        n = len(self.entries)
+        return self.entries[shard * n // shards:(shard + 1) * n // shards]
+
+    def iter_statements(self, entries=None):
+        """Decodifica solo le fette di byte delle istruzioni richieste."""
+        entries = self.entries if entries is None else entries
+        if not entries:
+            return
+        text_encoding = "utf-8" if self.encoding.lower().replace("_", "-") == "utf-8-sig" else self.encoding
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start, end, line in entries:
+                text = mm[start:end].decode(text_encoding, errors="replace").rstrip()
+                yield DDLStatement(text, line)
+
+
+def index_dump(path: str, encoding: str = "utf-8-sig", rebuild: bool = False,
+               index_path: str = None) -> StatementIndex:
+    """Indice del dump: riusa quello salvato se valido, altrimenti lo costruisce e lo salva."""
+    index = None if rebuild else StatementIndex.load(path, index_path, encoding)
+    if index is None:
+        index = StatementIndex.build(path, encoding)
+        try:
+            index.save(index_path)
+        except OSError as e:
+            # cartella in sola lettura: l'indice resta valido in memoria per questa esecuzione
+            logger.warning("|index_dump| indice non salvato per %s: %s", path, e)
+    return index
+
+
+def iter_indexed_tables(path: str, shard: int = 0, shards: int = 1, parser=DDLInfo,
+                        encoding: str = "utf-8-sig"):
+    """Come iter_tables, limitato alle istruzioni dello shard e letto via indice."""
+    index = index_dump(path, encoding)
+    for statement in index.iter_statements(index.shard(shard, shards)):
+        yield parser(statement.text)
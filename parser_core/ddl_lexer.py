@@ -0,0 +1,455 @@
+"""
+Sviluppatore: Antonio Nunziante
+Lexer a passata singola per istruzioni CREATE TABLE.
+
+Una sola scansione lineare del testo produce identita' della tabella,
+blocco colonne, definizioni, datatype, lunghezze e constraint (inline e a
+livello tabella), tenendo traccia di parentesi, quoting e commenti.
+
+La scansione e' lineare nella dimensione del testo; scan_deadline aggiunge
+un limite di tempo (per thread) verificato ogni _DEADLINE_EVERY token,
+usato dal parsing con budget (parser_core/bounded_parse.py).
+"""
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import NamedTuple
+
+# Un solo pattern alternato: ogni alternativa e' non ambigua, quindi la
+# scansione e' lineare anche su input malformati (quote o commenti non chiusi
+# terminano a fine testo).
+_TOKEN = re.compile(
+    r"(?P<ws>\s+)"
+    r"|(?P<lcomment>--[^\n]*)"
+    r"|(?P<bcomment>/\*[^*]*(?:\*(?!/)[^*]*)*(?:\*/|\Z))"
+    r"|(?P<string>'[^']*(?:''[^']*)*(?:'|\Z))"
+    r"|(?P<bt>`[^`]*(?:`|\Z))"
+    r"|(?P<dq>\"[^\"]*(?:\"|\Z))"
+    r"|(?P<sq>\[[^\]]*(?:\]|\Z))"
+    r"|(?P<word>[\w$#@]+)"
+    r"|(?P<punct>[(),.;])"
+    r"|(?P<other>.)",
+    re.DOTALL
+)
+_NUMERIC_LENGTH = re.compile(r"[\d,]+")
+
+# token letti tra due controlli del tempo limite
+_DEADLINE_EVERY = 1024
+
+_SKIP_KINDS = frozenset(("ws", "lcomment", "bcomment"))
+_IDENT_KINDS = frozenset(("word", "bt", "dq", "sq"))
+
+# Parole ammesse tra CREATE e TABLE
+_TABLE_MODIFIERS = frozenset((
+    "OR", "REPLACE", "GLOBAL", "LOCAL", "TEMPORARY", "TEMP", "TRANSIENT",
+    "DYNAMIC", "VOLATILE", "UNLOGGED", "EXTERNAL", "HYBRID", "MULTISET",
+    "SET", "PRIVATE", "SHARDED", "DUPLICATED", "IMMUTABLE", "BLOCKCHAIN",
+))
+_IF_NOT_EXISTS = frozenset(("IF", "NOT", "EXISTS"))
+# Continuazioni dei tipi multi-parola, dalla piu' lunga alla piu' corta
+_MULTIWORD_TYPES = {
+    "TIMESTAMP": (("WITH", "LOCAL", "TIME", "ZONE"), ("WITH", "TIME", "ZONE"), ("WITHOUT", "TIME", "ZONE")),
+    "TIME": (("WITH", "TIME", "ZONE"), ("WITHOUT", "TIME", "ZONE")),
+    "DOUBLE": (("PRECISION",),),
+    "CHARACTER": (("LARGE", "OBJECT"), ("VARYING",)),
+    "CHAR": (("LARGE", "OBJECT"), ("VARYING",)),
+    "NATIONAL": (("CHARACTER", "VARYING"), ("CHAR", "VARYING"), ("CHARACTER",), ("CHAR",)),
+    "NCHAR": (("VARYING",),),
+    "BINARY": (("LARGE", "OBJECT"), ("VARYING",)),
+    "BIT": (("VARYING",),),
+    "LONG": (("RAW",), ("VARCHAR",)),
+    "INTERVAL": (("YEAR", "TO", "MONTH"), ("DAY", "TO", "SECOND")),
+}
+# Parole che aprono una constraint a livello tabella (riservate: non sono nomi di colonna)
+_TABLE_CONSTRAINTS = frozenset(("CONSTRAINT", "UNIQUE", "CHECK"))
+# Aprono una constraint solo se seguite dalla sua sintassi, altrimenti sono
+# nomi di colonna (Key, Index, Period, ...): vedi _opens_constraint
+_INDEX_WORDS = frozenset(("INDEX", "KEY"))
+_INDEX_PREFIXES = frozenset(("FULLTEXT", "SPATIAL"))
+
+
+class TableScan(NamedTuple):
+    identity: dict
+    columns_block: str
+    column_defs: list
+    columns: list          # tuple (column_name, datatype, length)
+    primary_keys: list
+    foreign_keys: list
+
+
+_budget = threading.local()
+
+
+class ScanTimeout(Exception):
+    """Scansione interrotta: superato il tempo limite impostato con scan_deadline."""
+
+
+@contextmanager
+def scan_deadline(seconds: float = None):
+    """Le scansioni eseguite nel blocco (nello stesso thread) terminano con ScanTimeout dopo seconds."""
+    previous = getattr(_budget, 'deadline', None)
+    deadline = None if seconds is None else time.perf_counter() + seconds
+    if previous is not None:
+        deadline = previous if deadline is None else min(previous, deadline)
+    _budget.deadline = deadline
+    try:
+        yield
+    finally:
+        _budget.deadline = previous
+
+
+def _iter_tokens(ddl: str, pos: int):
+    for m in _TOKEN.finditer(ddl, pos):
+        kind = m.lastgroup
+        if kind in _SKIP_KINDS:
+            continue
+        yield kind, m.group(), m.start(), m.end()
+
+
+def _iter_tokens_until(ddl: str, pos: int, deadline: float):
+    clock = time.perf_counter
+    for count, m in enumerate(_TOKEN.finditer(ddl, pos)):
+        if not count % _DEADLINE_EVERY and clock() > deadline:
+            raise ScanTimeout(f"tempo limite superato dopo {count} token (posizione {m.start()} su {len(ddl)})")
+        kind = m.lastgroup
+        if kind in _SKIP_KINDS:
+            continue
+        yield kind, m.group(), m.start(), m.end()
+
+
+def _tokens(ddl: str, pos: int = 0):
+    deadline = getattr(_budget, 'deadline', None)
+    if deadline is None:
+        return _iter_tokens(ddl, pos)
+    return _iter_tokens_until(ddl, pos, deadline)
+
+
+def _unquote(kind: str, text: str) -> str:
+    if kind == "word":
+        return text
+    closing = "]" if kind == "sq" else text[0]
+    if len(text) > 1 and text[-1] == closing:
+        return text[1:-1]
+    return text[1:]
+
+
+def _identity(parts: list) -> dict:
+    # db.schema.table, schema.table, table (eventuale server.* scartato)
+    parts = ([None, None] + parts)[-3:]
+    return {'database': parts[0], 'schema': parts[1], 'table': parts[2]}
+
+
+def _qualified_name(toks: list, i: int):
+    """Legge un nome qualificato a partire da toks[i]; ritorna (nome, indice successivo)."""
+    parts = []
+    n = len(toks)
+    while i < n and toks[i][0] in _IDENT_KINDS:
+        parts.append(_unquote(toks[i][0], toks[i][1]))
+        i += 1
+        if i < n and toks[i][1] == ".":
+            i += 1
+            continue
+        break
+    return ".".join(parts), i
+
+
+def _paren_idents(toks: list, i: int):
+    """
+    Legge la lista di colonne tra parentesi che inizia a toks[i] == '('.
+    Per ogni elemento separato da virgola tiene il primo identificatore
+    (es. "col ASC" -> "col"). Ritorna (colonne, indice dopo la ')').
+    """
+    cols = []
+    depth = 0
+    expecting = True
+    n = len(toks)
+    while i < n:
+        kind, text = toks[i][0], toks[i][1]
+        i += 1
+        if text == "(" and kind == "punct":
+            depth += 1
+        elif text == ")" and kind == "punct":
+            depth -= 1
+            if depth == 0:
+                break
+        elif depth == 1 and kind == "punct" and text == ",":
+            expecting = True
+        elif depth == 1 and expecting and kind in _IDENT_KINDS:
+            cols.append(_unquote(kind, text))
+            expecting = False
+    return cols, i
+
+
+def _find_punct(toks: list, i: int, char: str) -> int:
+    n = len(toks)
+    while i < n and not (toks[i][0] == "punct" and toks[i][1] == char):
+        i += 1
+    return i
+
+
+def _parse_table_constraint(toks: list, primary_keys: list, foreign_keys: list):
+    i = 0
+    n = len(toks)
+    if toks[0][1].upper() == "CONSTRAINT":
+        i = 2
+    if i + 1 >= n:
+        return
+    head = toks[i][1].upper()
+    if head == "PRIMARY" and toks[i + 1][1].upper() == "KEY":
+        cols, _ = _paren_idents(toks, _find_punct(toks, i + 2, "("))
+        primary_keys.extend(cols)
+    elif head == "FOREIGN" and toks[i + 1][1].upper() == "KEY":
+        local_cols, i = _paren_idents(toks, _find_punct(toks, i + 2, "("))
+        if i >= n or toks[i][1].upper() != "REFERENCES":
+            return
+        ref_table, i = _qualified_name(toks, i + 1)
+        if not ref_table:
+            # REFERENCES senza tabella: non e' una foreign key
+            return
+        # senza colonne referenziate il riferimento e' alla PK della tabella
+        ref_cols, _ = _paren_idents(toks, i) if i < n and toks[i][1] == "(" else ([None] * len(local_cols), i)
+        for local_col, ref_col in zip(local_cols, ref_cols):
+            foreign_keys.append({
+                'column': local_col,
+                'ref_table': ref_table,
+                'ref_column': ref_col
+            })
+
+
+def _is_open(toks: list, i: int) -> bool:
+    return i < len(toks) and toks[i][0] == "punct" and toks[i][1] == "("
+
+
+def _paren_length(ddl: str, toks: list, i: int):
+    """Lunghezza numerica nel gruppo tra parentesi che inizia a toks[i]; ritorna (lunghezza, indice dopo la ')')."""
+    n = len(toks)
+    open_end = toks[i][3]
+    depth = 0
+    while i < n:
+        kind, text = toks[i][0], toks[i][1]
+        if kind == "punct" and text == "(":
+            depth += 1
+        elif kind == "punct" and text == ")":
+            depth -= 1
+            if depth == 0:
+                break
+        i += 1
+    close = toks[i][2] if i < n else toks[-1][3]
+    numeric = _NUMERIC_LENGTH.match("".join(ddl[open_end:close].split()))
+    return (numeric.group(0) if numeric else 0), i + 1
+
+
+def _match_type_phrase(ddl: str, toks: list, i: int, phrase: tuple):
+    """
+    Verifica che da toks[i] seguano le parole di phrase (eventuali gruppi
+    tra parentesi intermedi, es. INTERVAL DAY(2) TO SECOND, sono ammessi).
+    Ritorna (parole originali, lunghezza del primo gruppo, indice) o None.
+    """
+    words = []
+    length = 0
+    n = len(toks)
+    for word in phrase:
+        if _is_open(toks, i):
+            group_length, i = _paren_length(ddl, toks, i)
+            length = length or group_length
+        if i < n and toks[i][0] == "word" and toks[i][1].upper() == word:
+            words.append(toks[i][1])
+            i += 1
+        else:
+            return None
+    return words, length, i
+
+
+def _parse_column(ddl: str, toks: list, columns: list, primary_keys: list, foreign_keys: list):
+    name = _unquote(toks[0][0], toks[0][1])
+    n = len(toks)
+    datatype = None
+    length = 0
+    i = 1
+    if i < n and toks[i][0] == "word" and toks[i][1][0].isalpha():
+        datatype = toks[i][1]
+        i += 1
+        if _is_open(toks, i):
+            length, i = _paren_length(ddl, toks, i)
+        # tipi multi-parola (TIMESTAMP(6) WITH TIME ZONE, DOUBLE PRECISION, ...)
+        for phrase in _MULTIWORD_TYPES.get(datatype.upper(), ()):
+            matched = _match_type_phrase(ddl, toks, i, phrase)
+            if matched:
+                words, phrase_length, i = matched
+                datatype = " ".join([datatype] + words)
+                length = length or phrase_length
+                if not length and _is_open(toks, i):
+                    length, i = _paren_length(ddl, toks, i)
+                break
+    columns.append((name, datatype, length))
+
+    # constraint inline: solo al livello zero della definizione
+    depth = 0
+    while i < n:
+        kind, text = toks[i][0], toks[i][1]
+        i += 1
+        if kind == "punct":
+            if text == "(":
+                depth += 1
+            elif text == ")":
+                depth -= 1
+            continue
+        if depth or kind != "word":
+            continue
+        up = text.upper()
+        if up == "PRIMARY" and i < n and toks[i][1].upper() == "KEY":
+            primary_keys.append(name)
+            i += 1
+        elif up == "REFERENCES":
+            ref_table, i = _qualified_name(toks, i)
+            if not ref_table:
+                continue
+            ref_cols, i = _paren_idents(toks, i) if i < n and toks[i][1] == "(" else ([None], i)
+            foreign_keys.append({
+                'column': name,
+                'ref_table': ref_table,
+                'ref_column': ref_cols[0] if ref_cols else None
+            })
+
+
+def _is_length_group(toks: list, i: int) -> bool:
+    # "(10)", "(10,2)", "(MAX)": lunghezza di un datatype, non lista di colonne
+    return i + 1 < len(toks) and (toks[i + 1][1][0].isdigit() or toks[i + 1][1].upper() == "MAX")
+
+
+def _opens_index(toks: list, i: int) -> bool:
+    """Da toks[i] (dopo INDEX/KEY) segue [nome] [USING ...] (colonne)."""
+    n = len(toks)
+    named = i < n and toks[i][0] in _IDENT_KINDS and toks[i][1].upper() != "USING"
+    if named:
+        i += 1
+    if i < n and toks[i][0] == "word" and toks[i][1].upper() == "USING":
+        return True
+    # "Key VARCHAR(10)": nome seguito da una lunghezza, e' una colonna
+    return _is_open(toks, i) and not (named and _is_length_group(toks, i))
+
+
+def _opens_constraint(toks: list, up: str, nxt: str) -> bool:
+    """Parole non riservate che aprono una constraint solo con la sintassi che le segue."""
+    if up in _INDEX_WORDS:
+        return _opens_index(toks, 1)
+    if up in _INDEX_PREFIXES:
+        # FULLTEXT|SPATIAL [INDEX|KEY] [nome] (colonne)
+        return (nxt in _INDEX_WORDS and toks[1][0] == "word") or _opens_index(toks, 1)
+    if up == "PERIOD":
+        return nxt == "FOR"
+    if up == "EXCLUDE":
+        return nxt == "USING" or _is_open(toks, 1)
+    return False
+
+
+def _parse_definition(ddl: str, toks: list, columns: list, primary_keys: list, foreign_keys: list):
+    kind, text = toks[0][0], toks[0][1]
+    if kind == "word":
+        up = text.upper()
+        nxt = toks[1][1].upper() if len(toks) > 1 else ""
+        if up in _TABLE_CONSTRAINTS or (up in ("PRIMARY", "FOREIGN") and nxt == "KEY") \
+                or _opens_constraint(toks, up, nxt):
+            _parse_table_constraint(toks, primary_keys, foreign_keys)
+            return
+    if kind in _IDENT_KINDS:
+        _parse_column(ddl, toks, columns, primary_keys, foreign_keys)
+
+
+def _scan_header(tokens):
+    """Consuma i token fino al nome della prima CREATE TABLE; ritorna (parti, token successivo)."""
+    for kind, text, _, _ in tokens:
+        if kind != "word" or text.upper() != "CREATE":
+            continue
+        tok = next(tokens, None)
+        while tok is not None and tok[0] == "word" and tok[1].upper() in _TABLE_MODIFIERS:
+            tok = next(tokens, None)
+        if tok is None or tok[0] != "word" or tok[1].upper() != "TABLE":
+            continue
+        tok = next(tokens, None)
+        while tok is not None and tok[0] == "word" and tok[1].upper() in _IF_NOT_EXISTS:
+            tok = next(tokens, None)
+        parts = []
+        while tok is not None and tok[0] in _IDENT_KINDS:
+            parts.append(_unquote(tok[0], tok[1]))
+            tok = next(tokens, None)
+            if tok is None or tok[1] != ".":
+                break
+            tok = next(tokens, None)
+            while tok is not None and tok[1] == ".":
+                # db..table (schema di default SQL Server)
+                parts.append(None)
+                tok = next(tokens, None)
+        if parts:
+            return parts, tok
+    return None, None
+
+
+def scan_table_identity(ddl: str) -> dict:
+    """Legge solo database, schema e tabella della prima CREATE TABLE."""
+    parts, _ = _scan_header(_tokens(ddl))
+    if not parts:
+        return {'database': None, 'schema': None, 'table': None}
+    return _identity(parts)
+
+
+def scan_table_header(ddl: str):
+    """
+    Identita' della prima CREATE TABLE e posizione in cui inizia il resto
+    dell'istruzione (primo token dopo il nome). Ritorna (None, None) se
+    l'istruzione non contiene una CREATE TABLE.
+    """
+    parts, tok = _scan_header(_tokens(ddl))
+    if not parts:
+        return None, None
+    return _identity(parts), (len(ddl) if tok is None else tok[2])
+
+
+def scan_create_table(ddl: str) -> TableScan:
+    """Scansione completa della prima CREATE TABLE presente in ddl."""
+    tokens = _tokens(ddl)
+    parts, tok = _scan_header(tokens)
+    identity = _identity(parts) if parts else {'database': None, 'schema': None, 'table': None}
+    columns_block = ""
+    column_defs = []
+    columns = []
+    primary_keys = []
+    foreign_keys = []
+
+    # apertura del blocco colonne (CREATE TABLE ... AS SELECT non ha blocco)
+    while tok is not None and not (tok[0] == "punct" and tok[1] in "(;"):
+        if tok[0] == "word" and tok[1].upper() == "AS":
+            tok = None
+            break
+        tok = next(tokens, None)
+    if tok is None or tok[1] != "(":
+        return TableScan(identity, columns_block, column_defs, columns, primary_keys, foreign_keys)
+
+    block_start = tok[3]
+    block_end = len(ddl)
+    depth = 1
+    current = []
+    for tok in tokens:
+        kind, text = tok[0], tok[1]
+        if kind == "punct":
+            if text == "(":
+                depth += 1
+            elif text == ")":
+                depth -= 1
+                if depth == 0:
+                    block_end = tok[2]
+                    break
+            elif text == "," and depth == 1:
+                if current:
+                    column_defs.append(ddl[current[0][2]:current[-1][3]])
+                    _parse_definition(ddl, current, columns, primary_keys, foreign_keys)
+                current = []
+                continue
+        current.append(tok)
+    if current:
+        column_defs.append(ddl[current[0][2]:current[-1][3]])
+        _parse_definition(ddl, current, columns, primary_keys, foreign_keys)
+    columns_block = ddl[block_start:block_end]
+    return TableScan(identity, columns_block, column_defs, columns, primary_keys, foreign_keys)
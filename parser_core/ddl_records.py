@@ -0,0 +1,108 @@
+"""
+Sviluppatore: Antonio Nunziante
+Record compatti per i metadati di tabella e colonna.
+
+ColumnMeta e TableMeta sono NamedTuple (nessun __dict__ per istanza):
+l'identita' della tabella e' memorizzata una sola volta in TableMeta e gli
+identificatori sono internati, cosi' stringhe ripetute (datatype, 'Y'/'N',
+nomi tabella) occupano memoria una volta sola. Le conversioni in dict e
+DataFrame sono prodotte su richiesta.
+"""
+
+import sys
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+TABLE_FIELDS = ('fully_qualified_table', 'database', 'schema_name', 'table_name')
+COLUMN_FIELDS = ('column_name', 'datatype', 'length', 'is_key', 'is_foreign', 'foreign_table', 'foreign_key')
+ROW_FIELDS = TABLE_FIELDS + COLUMN_FIELDS
+
+
+def intern_name(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class ColumnMeta(NamedTuple):
+    column_name: str
+    datatype: str
+    length: object              # stringa numerica ("10,2") oppure 0
+    is_key: str
+    is_foreign: str
+    foreign_table: Optional[str]
+    foreign_key: Optional[str]
+
+
+class TableMeta(NamedTuple):
+    fully_qualified_table: str
+    database: str
+    schema_name: str
+    table_name: str
+    columns: tuple              # tuple di ColumnMeta
+
+    @property
+    def identity(self) -> tuple:
+        return self[:4]
+
+    def iter_rows(self):
+        """Genera le righe piatte (identita' tabella + colonna) come tuple."""
+        identity = self[:4]
+        for column in self.columns:
+            yield identity + column
+
+    def to_dict(self) -> list:
+        return [dict(zip(ROW_FIELDS, row)) for row in self.iter_rows()]
+
+    def to_dataframe(self) -> "pd.DataFrame":
+        import pandas as pd     # import lazy: il parser non dipende da pandas
+        from parser_core.metrics import METRICS
+        if not self.columns:
+            return pd.DataFrame()
+        with METRICS.timer('dataframe_build'):
+            n = len(self.columns)
+            data = {field: [value] * n for field, value in zip(TABLE_FIELDS, self[:4])}
+            data.update(zip(COLUMN_FIELDS, (list(values) for values in zip(*self.columns))))
+            return pd.DataFrame(data, columns=list(ROW_FIELDS))
+
+    def to_arrow(self):
+        """pyarrow.Table con identificatori dictionary-encoded (pyarrow opzionale)."""
+        from parser_core.ddl_arrow import to_arrow_table
+        return to_arrow_table([self])
+
+
+def table_identity(db_schema_table: dict) -> tuple:
+    """(fully_qualified_table, database, schema_name, table_name) interni, come nei record TableMeta."""
+    db = intern_name(db_schema_table.get('database') or '')
+    sc = intern_name(db_schema_table.get('schema') or '')
+    tb = intern_name(db_schema_table.get('table') or '')
+    return intern_name('.'.join(p for p in (db, sc, tb) if p)), db, sc, tb
+
+
+def build_table_meta(db_schema_table: dict, columns, primary_keys, foreign_keys) -> TableMeta:
+    """
+    Costruisce il TableMeta a partire da identita' (database/schema/table),
+    colonne (name, datatype, length) e constraint.
+    """
+    fq_table, db, sc, tb = table_identity(db_schema_table)
+
+    pk = set(primary_keys)
+    fk_by_column = {}
+    for f in foreign_keys:
+        fk_by_column.setdefault(f['column'], f)
+
+    records = []
+    for name, dtype, length in columns:
+        if not name or not dtype:
+            continue
+        fk = fk_by_column.get(name)
+        records.append(ColumnMeta(
+            intern_name(name),
+            intern_name(dtype),
+            intern_name(length),
+            'Y' if name in pk else 'N',
+            'Y' if fk else 'N',
+            intern_name(fk['ref_table']) if fk else None,
+            intern_name(fk['ref_column']) if fk else None,
+        ))
+    return TableMeta(fq_table, db, sc, tb, tuple(records))
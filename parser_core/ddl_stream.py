@@ -0,0 +1,159 @@
+"""
+Sviluppatore: Antonio Nunziante
+Parsing in streaming di interi dump SQL (SQL Server, Oracle, ...).
+
+Il file viene letto riga per riga: lo splitter separa le istruzioni su ';',
+sui separatori di batch GO (SQL Server) e '/' (SQL*Plus), ignorando quelli
+contenuti in stringhe, identificatori quotati e commenti. Solo le istruzioni
+CREATE TABLE vengono bufferizzate e passate al parser, le altre vengono
+scartate appena riconosciute: la memoria resta limitata alla singola
+istruzione indipendentemente dalla dimensione del dump.
+"""
+
+import os
+import re
+from typing import NamedTuple
+
+from parser_core.info_ddl_oop import DDLInfo
+
+_SPECIAL = re.compile(r"--|/\*|['\"`\[;]")
+_BATCH_SEPARATOR = re.compile(r"[ \t]*(?:GO(?:[ \t]+\d+)?|/)[ \t]*\r?\n?\Z", re.IGNORECASE)
+_CREATE_TABLE_HEAD = re.compile(r"CREATE\b(?:\s+\w+){0,4}?\s+TABLE\b", re.IGNORECASE)
+_CLOSING = {"'": "'", '"': '"', "`": "`", "[": "]", "/*": "*/"}
+# caratteri sufficienti a decidere se l'istruzione e' una CREATE TABLE
+_HEAD_SIZE = 256
+
+
+class DDLStatement(NamedTuple):
+    text: str
+    line: int
+
+
+class _StatementSplitter:
+    def __init__(self, track_spans: bool = False):
+        self.closing = None     # terminatore atteso dentro stringa/commento
+        # (riga, colonna) di inizio e fine delle istruzioni emesse, per l'indice a offset
+        self.spans = [] if track_spans else None
+        self._reset()
+
+    def _reset(self):
+        self.parts = []
+        self.size = 0
+        self.started = False    # primo carattere significativo gia' letto
+        self.keep = True        # False: istruzione non CREATE TABLE, non bufferizzata
+        self.decided = False
+        self.start_line = 0
+        self.start_col = 0
+
+    def _append(self, chunk: str):
+        if self.keep:
+            self.parts.append(chunk)
+            self.size += len(chunk)
+
+    def _decide(self):
+        self.decided = True
+        if not _CREATE_TABLE_HEAD.match("".join(self.parts)[:_HEAD_SIZE]):
+            self.keep = False
+            self.parts = []
+
+    def _finish(self, ready: list, end=None):
+        # end: (riga, colonna) del terminatore; None = fine del file
+        if self.started and self.keep:
+            if not self.decided:
+                self._decide()
+            if self.keep:
+                ready.append(DDLStatement("".join(self.parts).rstrip(), self.start_line))
+                if self.spans is not None:
+                    self.spans.append((self.start_line, self.start_col, end))
+        self._reset()
+
+    def feed(self, line: str, lineno: int) -> list:
+        ready = []
+        if self.closing is None and _BATCH_SEPARATOR.match(line):
+            self._finish(ready, (lineno, 0))
+            return ready
+        pos = 0
+        n = len(line)
+        while pos < n:
+            if self.closing is not None:
+                end = line.find(self.closing, pos)
+                stop = n if end < 0 else end + len(self.closing)
+                if self.started:
+                    self._append(line[pos:stop])
+                if end >= 0:
+                    self.closing = None
+                pos = stop
+                continue
+            m = _SPECIAL.search(line, pos)
+            stop = m.start() if m else n
+            if pos < stop:
+                chunk = line[pos:stop]
+                if not self.started:
+                    stripped = chunk.lstrip()
+                    if stripped:
+                        self.started = True
+                        self.start_line = lineno
+                        self.start_col = stop - len(stripped)
+                    chunk = stripped
+                if self.started:
+                    self._append(chunk)
+            if m is None:
+                break
+            token = m.group()
+            pos = m.end()
+            if token == ";":
+                self._finish(ready, (lineno, m.start()))
+            elif token == "--":
+                if self.started:
+                    self._append(line[m.start():])
+                pos = n
+            else:
+                self.closing = _CLOSING[token]
+                if not self.started and token != "/*":
+                    self.started = True
+                    self.start_line = lineno
+                    self.start_col = m.start()
+                if self.started:
+                    self._append(token)
+        if self.started and not self.decided and self.size >= _HEAD_SIZE:
+            self._decide()
+        return ready
+
+    def close(self) -> list:
+        ready = []
+        self._finish(ready)
+        return ready
+
+
+def _open(source, encoding: str):
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "r", encoding=encoding, errors="replace", newline=""), True
+    return source, False
+
+
+def iter_statements(source, encoding: str = "utf-8-sig"):
+    """
+    Genera le istruzioni CREATE TABLE (DDLStatement: testo e riga di inizio)
+    contenute in un file di testo, un path o un iterabile di righe.
+    """
+    fileobj, owned = _open(source, encoding)
+    splitter = _StatementSplitter()
+    try:
+        for lineno, line in enumerate(fileobj, 1):
+            ready = splitter.feed(line, lineno)
+            if ready:
+                yield from ready
+        yield from splitter.close()
+    finally:
+        if owned:
+            fileobj.close()
+
+
+def iter_tables(source, parser=DDLInfo, encoding: str = "utf-8-sig"):
+    """
+    Genera una tabella parsata per ogni CREATE TABLE del dump.
+    parser e' il costruttore da applicare al testo dell'istruzione
+    (es. functools.partial(SnowflakeExtend, source_db="oracle")).
+    """
+    for statement in iter_statements(source, encoding):
+        yield parser(statement.text)
@@ -0,0 +1,152 @@
+"""
+Sviluppatore: Antonio Nunziante
+Deduplicazione strutturale: tabelle con la stessa forma parsate una volta.
+
+Partizioni mensili (SALES_2023_01, SALES_2023_02, ...), gemelle ST/ODS e
+copie per tenant differiscono solo per il nome. L'impronta di
+un'istruzione e' l'hash del testo che segue il nome della tabella
+(intestazione CREATE ... TABLE db.schema.nome esclusa): la prima istruzione
+di ogni forma viene parsata e il suo TableMeta diventa il template; le
+successive leggono solo l'intestazione e ricevono il template con la
+propria identita' (TableMeta._replace). La tupla dei ColumnMeta e' la
+stessa per tutte le istanze della forma.
+
+Il nome della tabella compare spesso anche nel corpo (CONSTRAINT
+PK_SALES_2023_01 ...): nell'impronta viene mascherato quando inizia con
+una lettera e contiene una cifra o un underscore. Nessuna parola chiave
+del lexer ha queste caratteristiche, quindi i token che contengono il nome
+non cambiano ruolo e l'output dipende dal nome solo se lo contiene. Un
+template il cui output contiene il proprio nome (FK verso se stessa,
+colonne che ripetono il nome) vale solo per quel nome: le altre tabelle
+della forma vengono parsate normalmente.
+"""
+
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from typing import NamedTuple
+
+from mainconfig import config
+from parser_core.ddl_lexer import scan_table_header
+from parser_core.ddl_records import TableMeta, table_identity
+from parser_core.info_ddl_oop import DDLInfo
+from parser_core.metrics import METRICS
+
+logger = logging.getLogger("info_DDL_oop")
+
+_MASKABLE = re.compile(r"[A-Za-z][A-Za-z0-9_]*")
+_MASK = "\0"
+
+
+class _Template(NamedTuple):
+    meta: TableMeta
+    name: str               # nome della tabella da cui e' stato creato il template
+    portable: bool          # False se l'output contiene il nome: valido solo per lo stesso nome
+    primary_keys: int
+    foreign_keys: int
+
+
+def _maskable(name) -> bool:
+    return bool(name) and _MASKABLE.fullmatch(name) is not None and any(c.isdigit() or c == "_" for c in name)
+
+
+def fingerprint(ddl: str):
+    """
+    (impronta, identita', mascherato) di una CREATE TABLE; impronta None se
+    l'istruzione non contiene una CREATE TABLE.
+    """
+    identity, body_start = scan_table_header(ddl)
+    if identity is None:
+        return None, None, False
+    body = ddl[body_start:].rstrip()
+    name = identity.get('table')
+    masked = _maskable(name) and name in body and _MASK not in body
+    if masked:
+        body = body.replace(name, _MASK)
+    digest = hashlib.blake2b(body.encode("utf-8", "surrogatepass"), digest_size=16)
+    digest.update(b"\1" if masked else b"\0")
+    return digest.digest(), identity, masked
+
+
+def _mentions(meta: TableMeta, name: str) -> bool:
+    # una sola ricerca su tutti i valori di colonna (i campi sono stringhe o None)
+    text = "\0".join(value for column in meta.columns for value in column if value)
+    return name.upper() in text.upper()
+
+
+class TemplateCache:
+    """
+    Parser con deduplicazione per forma. parser e' il parser usato per la
+    prima istruzione di ogni forma (DDLInfo o ParseCache.parse); parse()
+    ritorna come quello un oggetto con table_meta, quindi e' utilizzabile
+    con parse_bounded e iter_tables.
+    """
+    def __init__(self, parser=DDLInfo, max_items: int = None):
+        self.parser = parser
+        self.max_items = config.template_cache_items if max_items is None else max_items
+        self._templates = OrderedDict()
+        self.stats = {'statements': 0, 'hits': 0, 'misses': 0, 'name_dependent': 0,
+                      'shared_columns': 0, 'evictions': 0}
+
+    def __len__(self):
+        return len(self._templates)
+
+    def _remember(self, key: bytes, template: _Template):
+        if not self.max_items:
+            return
+        self._templates[key] = template
+        while len(self._templates) > self.max_items:
+            self._templates.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def parse(self, ddl: str):
+        """Oggetto del parser con table_meta dal template della forma, se gia' vista."""
+        self.stats['statements'] += 1
+        key, identity, masked = fingerprint(ddl)
+        template = self._templates.get(key) if key is not None else None
+        name = identity.get('table') if identity else None
+        if template is not None and not (masked and not template.portable and template.name != name):
+            self._templates.move_to_end(key)
+            fq_table, db, sc, tb = table_identity(identity)
+            meta = template.meta._replace(fully_qualified_table=fq_table, database=db, schema_name=sc, table_name=tb)
+            self.stats['hits'] += 1
+            self.stats['shared_columns'] += len(meta.columns)
+            # contatori come per una tabella parsata (DDLInfo.table_meta)
+            METRICS.inc('template_hits')
+            METRICS.inc('tables')
+            METRICS.inc('columns', len(meta.columns))
+            METRICS.inc('primary_keys', template.primary_keys)
+            METRICS.inc('foreign_keys', template.foreign_keys)
+            parsed = DDLInfo(ddl)
+            # gli attributi lazy (cached_property) leggono prima il __dict__ dell'istanza
+            parsed.__dict__.update(db_schema_table=identity, table_meta=meta)
+            return parsed
+        if template is not None:
+            self.stats['name_dependent'] += 1
+            logger.debug("|TemplateCache.parse| %s: forma nota ma template legato al nome %s", name, template.name)
+        parsed = self.parser(ddl)
+        meta = parsed.table_meta
+        self.stats['misses'] += 1
+        if key is not None and template is None:
+            scan = parsed.__dict__.get('_scan')
+            if scan is not None:
+                primary_keys, foreign_keys = len(scan.primary_keys), len(scan.foreign_keys)
+            else:
+                primary_keys = sum(c.is_key == 'Y' for c in meta.columns)
+                foreign_keys = sum(c.is_foreign == 'Y' for c in meta.columns)
+            portable = not (masked and _mentions(meta, name))
+            self._remember(key, _Template(meta, name, portable, primary_keys, foreign_keys))
+        return parsed
+
+    def table_meta(self, ddl: str) -> TableMeta:
+        return self.parse(ddl).table_meta
+
+    def report(self) -> dict:
+        """Statistiche di deduplicazione: forme distinte, hit, colonne condivise."""
+        statements = self.stats['statements']
+        return {
+            **self.stats,
+            'templates': len(self._templates),
+            'dedup_ratio': round(self.stats['hits'] / statements, 4) if statements else 0.0,
+        }
@@ -0,0 +1,210 @@
+"""
+Sviluppatore: Antonio Nunziante
+Metriche di esecuzione: contatori e istogrammi di latenza per fase.
+
+Contatori: tabelle, colonne, primary key, foreign key, tipi non mappati,
+fallimenti (per motivo). Istogrammi (bucket fissi, in secondi) per fase:
+- scan: lexer a passata singola (blocco colonne, split delle definizioni,
+  PK e FK sono estratti nella stessa scansione)
+- row_build: costruzione dei record TableMeta/ColumnMeta
+- dataframe_build: DataFrame per tabella o di catalogo
+- transform.<stage>: stage della pipeline di trasformazione (es.
+  transform.type_mapping)
+
+Il costo per osservazione e' un bisect su ~20 bucket e due somme: le
+metriche restano attive in produzione (config.metrics_enabled).
+Esportazione a fine esecuzione in OpenMetrics (testo) o JSON; i processi
+worker inviano snapshot() che il processo principale unisce con merge().
+"""
+
+import json
+import math
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from mainconfig import config
+
+# limiti superiori dei bucket (secondi); l'ultimo bucket e' +Inf
+BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+PREFIX = "ddl_"
+
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Stima dal limite superiore del bucket (il massimo osservato per l'ultimo bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {'counts': list(self.counts), 'count': self.count, 'sum': self.sum, 'max': self.max}
+
+    def merge(self, snapshot: dict):
+        self.counts = [a + b for a, b in zip(self.counts, snapshot['counts'])]
+        self.count += snapshot['count']
+        self.sum += snapshot['sum']
+        self.max = max(self.max, snapshot['max'])
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(pairs) -> str:
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _counter_name(name: str, key: tuple) -> str:
+    return name + _format_labels(key)
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.started = time.time()
+        self.counters = {}          # (nome, etichette) -> valore
+        self.phases = {}            # fase -> Histogram
+
+    # -------------------------
+    # REGISTRAZIONE
+    # -------------------------
+    def inc(self, name: str, value: int = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def value(self, name: str, **labels) -> int:
+        return self.counters.get((name, _label_key(labels)), 0)
+
+    def observe(self, phase: str, seconds: float):
+        if not self.enabled:
+            return
+        histogram = self.phases.get(phase)
+        if histogram is None:
+            histogram = self.phases[phase] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, phase: str):
+        """Misura il blocco nella fase indicata (per i punti caldi usare observe con perf_counter)."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+
+    def reset(self):
+        self.started = time.time()
+        self.counters.clear()
+        self.phases.clear()
+
+    # -------------------------
+    # AGGREGAZIONE TRA PROCESSI
+    # -------------------------
+    def snapshot(self) -> dict:
+        """Stato serializzabile (pickle/JSON) da inviare al processo principale."""
+        return {
+            'counters': [[name, [list(p) for p in key], value] for (name, key), value in self.counters.items()],
+            'phases': {phase: h.snapshot() for phase, h in self.phases.items()},
+        }
+
+    def merge(self, snapshot: dict):
+        for name, key, value in snapshot.get('counters', ()):
+            key = (name, tuple(tuple(p) for p in key))
+            self.counters[key] = self.counters.get(key, 0) + value
+        for phase, data in snapshot.get('phases', {}).items():
+            histogram = self.phases.get(phase)
+            if histogram is None:
+                histogram = self.phases[phase] = Histogram()
+            histogram.merge(data)
+
+    # -------------------------
+    # ESPORTAZIONE
+    # -------------------------
+    def summary(self) -> dict:
+        """Riepilogo JSON: contatori e, per fase, conteggio, totale e percentili (ms)."""
+        return {
+            'uptime_s': round(time.time() - self.started, 3),
+            'counters': {_counter_name(name, key): value for (name, key), value in sorted(self.counters.items())},
+            'phases': {
+                phase: {
+                    'count': h.count,
+                    'total_s': round(h.sum, 6),
+                    'mean_ms': round(h.sum / h.count * 1000, 4) if h.count else 0.0,
+                    'p50_ms': round(h.quantile(0.5) * 1000, 4),
+                    'p95_ms': round(h.quantile(0.95) * 1000, 4),
+                    'p99_ms': round(h.quantile(0.99) * 1000, 4),
+                    'max_ms': round(h.max * 1000, 4),
+                }
+                for phase, h in sorted(self.phases.items())
+            },
+        }
+
+    def to_openmetrics(self) -> str:
+        lines = []
+        by_name = {}
+        for (name, key), value in sorted(self.counters.items()):
+            by_name.setdefault(name, []).append((key, value))
+        for name, samples in by_name.items():
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            lines.extend(f"{PREFIX}{name}_total{_format_labels(key)} {value}" for key, value in samples)
+        if self.phases:
+            family = f"{PREFIX}phase_seconds"
+            lines.append(f"# TYPE {family} histogram")
+            lines.append(f"# UNIT {family} seconds")
+            for phase, h in sorted(self.phases.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS + (math.inf,), h.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == math.inf else repr(bound)
+                    lines.append(f"{family}_bucket{_format_labels((('phase', phase), ('le', le)))} {cumulative}")
+                lines.append(f"{family}_count{_format_labels((('phase', phase),))} {h.count}")
+                lines.append(f"{family}_sum{_format_labels((('phase', phase),))} {h.sum!r}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """OpenMetrics per .prom/.txt/.om, JSON per .json."""
+        path = str(path)
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                json.dump(self.summary(), f, indent=2)
+            else:
+                f.write(self.to_openmetrics())
+
+
+# registro del processo: gli entry point lo esportano a fine esecuzione
+METRICS = MetricsRegistry(config.metrics_enabled)
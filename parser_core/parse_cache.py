@@ -0,0 +1,208 @@
+"""
+Sviluppatore: Antonio Nunziante
+Cache persistente dei risultati di parsing, indirizzata per contenuto.
+
+La chiave e' l'hash SHA-256 di: versione del parser, source_db e testo DDL
+normalizzato (fine riga uniformi, spazi finali rimossi). Due livelli:
+- memoria: LRU di payload serializzati (pickle);
+- disco: SQLite con eviction per dimensione totale (meno usati di recente).
+
+Un hit ricostruisce l'istanza (DDLInfo o SnowflakeExtend) con gli attributi
+gia' calcolati: nessun parsing e nessuna costruzione di DataFrame.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+
+from mainconfig import config
+from parser_core.info_ddl_oop import PARSER_VERSION, DDLInfo
+
+logger = logging.getLogger("info_DDL_oop")
+
+# frazione di max_bytes oltre la quale la stima locale viene verificata a ogni commit
+_SYNC_RATIO = 0.9
+
+# attributi memorizzati per tipo di risultato
+_DDLINFO_STATE = ('db_schema_table', 'table_meta')
+_SNOWFLAKE_STATE = _DDLINFO_STATE + ('dataframe_snw',)
+
+
+def normalize_ddl(ddl: str) -> str:
+    return "\n".join(line.rstrip() for line in ddl.strip().splitlines())
+
+
+class ParseCache:
+    def __init__(self, path: str = None, memory_items: int = None, max_bytes: int = None, sync_every: int = None):
+        self.memory_items = config.cache_memory_items if memory_items is None else memory_items
+        self.max_bytes = config.cache_max_bytes if max_bytes is None else max_bytes
+        self.sync_every = config.cache_sync_every if sync_every is None else sync_every
+        self._commits = 0
+        self._memory = OrderedDict()
+        self._touched = {}
+        self._pending = 0
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        self._db = None
+        self._disk_bytes = 0
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS parse_cache ("
+                "key TEXT PRIMARY KEY, payload BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS parse_cache_lru ON parse_cache(last_used)")
+            self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM parse_cache").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------
+    # CHIAVI E LIVELLI
+    # -------------------------
+    @staticmethod
+    def key(ddl: str, source_db: str = None) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{PARSER_VERSION}\0{source_db or ''}\0".encode())
+        digest.update(normalize_ddl(ddl).encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def _remember(self, key: str, payload: bytes):
+        if not self.memory_items:
+            return
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        payload = self._memory.get(key)
+        if payload is not None:
+            self._memory.move_to_end(key)
+            self.stats['memory_hits'] += 1
+            return payload
+        if self._db is not None:
+            row = self._db.execute("SELECT payload FROM parse_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                payload = row[0]
+                self._touched[key] = time.time()
+                self._remember(key, payload)
+                self.stats['disk_hits'] += 1
+                return payload
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, key: str, payload: bytes):
+        self._remember(key, payload)
+        self.stats['stores'] += 1
+        if self._db is None:
+            return
+        size = len(payload)
+        previous = self._db.execute("SELECT size FROM parse_cache WHERE key = ?", (key,)).fetchone()
+        self._db.execute(
+            "INSERT OR REPLACE INTO parse_cache(key, payload, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, payload, size, time.time())
+        )
+        self._disk_bytes += size - (previous[0] if previous else 0)
+        self._pending += 1
+        if self._disk_bytes > self.max_bytes:
+            self._evict()
+        if self._pending >= 500:
+            self.commit()
+
+    def _sync_size(self) -> int:
+        """
+        Dimensione reale su disco letta dentro una transazione di scrittura:
+        piu' processi (worker di massive_ingest) scrivono sullo stesso file e
+        il contatore locale vede solo le proprie scritture. La lettura e' una
+        scansione della tabella: vedi commit per quando viene eseguita.
+        """
+        if not self._db.in_transaction:
+            self._db.execute("BEGIN IMMEDIATE")
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM parse_cache").fetchone()[0]
+        return self._disk_bytes
+
+    def _evict(self):
+        self._flush_touched()
+        if self._sync_size() <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for key, size in self._db.execute("SELECT key, size FROM parse_cache ORDER BY last_used").fetchall():
+            if self._disk_bytes <= target:
+                break
+            self._db.execute("DELETE FROM parse_cache WHERE key = ?", (key,))
+            self._disk_bytes -= size
+            evicted += 1
+        self.stats['evictions'] += evicted
+        logger.info("|ParseCache._evict| rimossi %d elementi, %d byte su disco", evicted, self._disk_bytes)
+
+    def _flush_touched(self):
+        if self._touched:
+            self._db.executemany(
+                "UPDATE parse_cache SET last_used = ? WHERE key = ?",
+                [(ts, key) for key, ts in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def commit(self):
+        if self._db is not None:
+            self._flush_touched()
+            # dimensione condivisa (scritture degli altri processi) riletta vicino al limite
+            # o ogni sync_every commit: non a ogni file di massive_ingest
+            self._commits += 1
+            near_limit = self._disk_bytes >= self.max_bytes * _SYNC_RATIO
+            if near_limit or (self.sync_every and self._commits % self.sync_every == 0):
+                if self._sync_size() > self.max_bytes:
+                    self._evict()
+            self._db.commit()
+            self._pending = 0
+
+    def close(self):
+        if self._db is not None:
+            self.commit()
+            self._db.close()
+            self._db = None
+
+    # -------------------------
+    # PARSING CON CACHE
+    # -------------------------
+    def parse(self, ddl: str, source_db: str = None):
+        """
+        DDLInfo(ddl) se source_db e' None, altrimenti SnowflakeExtend(ddl, source_db);
+        su hit l'istanza e' ricostruita dagli attributi memorizzati.
+        """
+        if source_db is None:
+            cls, args, fields = DDLInfo, (ddl,), _DDLINFO_STATE
+        else:
+            from snowflake.Snowflake_extension_engine import SnowflakeExtend
+            cls, args, fields = SnowflakeExtend, (ddl, source_db), _SNOWFLAKE_STATE
+        key = self.key(ddl, source_db)
+        payload = self.get(key)
+        if payload is not None:
+            obj = cls.__new__(cls)
+            # gli attributi lazy (cached_property) leggono prima il __dict__ dell'istanza
+            obj.__dict__.update(pickle.loads(payload))
+            obj.__init__(*args)
+            return obj
+        obj = cls(*args)
+        state = {name: getattr(obj, name) for name in fields}
+        self.put(key, pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+        return obj
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.stats['memory_hits'] + self.stats['disk_hits']
+        total = hits + self.stats['misses']
+        return hits / total if total else 0.0
+
+    def report(self) -> dict:
+        return dict(self.stats, hit_rate=round(self.hit_rate, 4), disk_bytes=self._disk_bytes)
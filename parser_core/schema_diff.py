@@ -0,0 +1,260 @@
+"""
+Sviluppatore: Antonio Nunziante
+Diff strutturale tra due snapshot di catalogo (es. DDL di ieri e di oggi).
+
+Ogni tabella ha un fingerprint (BLAKE2b dei suoi ColumnMeta): le tabelle
+con fingerprint uguale vengono saltate con un confronto O(1) e solo quelle
+cambiate sono confrontate colonna per colonna, via dizionario sul nome.
+Opzionalmente vengono generate le ALTER necessarie ad allineare il vecchio
+schema al nuovo (sintassi ANSI/Snowflake, datatype sorgente). Le tabelle
+con le sole colonne riordinate sono segnalate (order_only) senza ALTER.
+"""
+
+import hashlib
+from typing import NamedTuple
+
+from parser_core.catalog import Catalog
+from parser_core.ddl_idents import quote_ident, quote_qualified
+from parser_core.ddl_records import TableMeta
+
+
+class ColumnChange(NamedTuple):
+    column_name: str
+    old: object             # ColumnMeta
+    new: object             # ColumnMeta
+    changes: tuple          # ('datatype', 'length')
+
+
+class TableDiff(NamedTuple):
+    table: str
+    added_columns: list
+    dropped_columns: list
+    changed_columns: list   # ColumnChange
+    old_primary_key: tuple
+    new_primary_key: tuple
+    added_foreign_keys: list    # (colonne, foreign_table, colonne referenziate): una tupla per constraint
+    dropped_foreign_keys: list
+    reordered: bool             # ordine delle colonne comuni cambiato
+
+    @property
+    def primary_key_changed(self) -> bool:
+        return self.old_primary_key != self.new_primary_key
+
+    @property
+    def order_only(self) -> bool:
+        """Solo colonne riordinate: nessuna ALTER necessaria."""
+        return not (self.added_columns or self.dropped_columns or self.changed_columns or self.primary_key_changed
+                    or self.added_foreign_keys or self.dropped_foreign_keys)
+
+
+class SchemaDiff(NamedTuple):
+    added_tables: list      # TableMeta
+    dropped_tables: list    # TableMeta
+    changed_tables: list    # TableDiff
+    unchanged: int
+    alter_statements: list
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added_tables or self.dropped_tables or self.changed_tables)
+
+
+def table_fingerprint(meta: TableMeta) -> str:
+    """Fingerprint strutturale della tabella (colonne, tipi, lunghezze, PK/FK)."""
+    text = "\x1e".join("\x1f".join(map(str, c)) for c in meta.columns)
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def snapshot(tables) -> dict:
+    """fully_qualified_table -> (fingerprint, TableMeta) per TableMeta o DDLInfo in input."""
+    snap = {}
+    for table in tables:
+        meta = table if isinstance(table, TableMeta) else table.table_meta
+        snap[meta.fully_qualified_table] = (table_fingerprint(meta), meta)
+    return snap
+
+
+class _References:
+    """
+    Tabelle referenziate dalle FK di uno snapshot, risolte come
+    Catalog.resolve_table (REFERENCES clienti -> stesso database/schema, poi
+    suffisso univoco). Il Catalog e' costruito solo se un riferimento non e'
+    gia' un nome qualificato dello snapshot.
+    """
+
+    def __init__(self, snap: dict):
+        self.snap = snap
+        self._catalog = None
+        self._resolved = {}     # (riferimento, database, schema) -> TableMeta o None
+
+    def target(self, ref_table: str, from_table: TableMeta):
+        exact = self.snap.get(ref_table)
+        if exact is not None:
+            return exact[1]
+        lookup = (ref_table, from_table.database, from_table.schema_name)
+        if lookup not in self._resolved:
+            if self._catalog is None:
+                self._catalog = Catalog(meta for _, meta in self.snap.values())
+            key, _ = self._catalog.resolve_table(ref_table, from_table)
+            self._resolved[lookup] = self._catalog.get(key) if key is not None else None
+        return self._resolved[lookup]
+
+
+def _primary_key(meta: TableMeta) -> tuple:
+    return tuple(c.column_name for c in meta.columns if c.is_key == 'Y')
+
+
+def _foreign_keys(meta: TableMeta, refs: _References) -> set:
+    """
+    FK della tabella come constraint (colonne, tabella referenziata, colonne
+    referenziate). Le colonne verso la stessa tabella formano una FK composta
+    finche' la colonna referenziata non si ripete (created_by e updated_by
+    verso users.id sono due FK); senza colonne referenziate (PK implicita)
+    sono raggruppate a blocchi di tante colonne quante la PK della tabella
+    referenziata nello snapshot (una se non risolta).
+    """
+    chunks = {}     # foreign_table -> [[(colonna, colonna referenziata)]]
+    for c in meta.columns:
+        if c.is_foreign != 'Y':
+            continue
+        groups = chunks.setdefault(c.foreign_table, [[]])
+        current = groups[-1]
+        if not current:
+            full = False
+        elif c.foreign_key is None:
+            target = refs.target(c.foreign_table, meta)
+            size = len(_primary_key(target)) if target is not None else 1
+            full = current[0][1] is not None or len(current) >= max(size, 1)
+        else:
+            full = current[0][1] is None or any(ref == c.foreign_key for _, ref in current)
+        if full:
+            current = []
+            groups.append(current)
+        current.append((c.column_name, c.foreign_key))
+    return {
+        (tuple(column for column, _ in group), table, tuple(ref for _, ref in group if ref is not None))
+        for table, groups in chunks.items() for group in groups
+    }
+
+
+def _diff_table(old: TableMeta, new: TableMeta,
+                old_refs: _References = None, new_refs: _References = None) -> TableDiff:
+    old_cols = {c.column_name: c for c in old.columns}
+    new_cols = {c.column_name: c for c in new.columns}
+    added = [c for name, c in new_cols.items() if name not in old_cols]
+    dropped = [c for name, c in old_cols.items() if name not in new_cols]
+    changed = []
+    for name, new_col in new_cols.items():
+        old_col = old_cols.get(name)
+        if old_col is None or old_col == new_col:
+            continue
+        kinds = tuple(k for k in ('datatype', 'length') if getattr(old_col, k) != getattr(new_col, k))
+        if kinds:
+            changed.append(ColumnChange(name, old_col, new_col, kinds))
+    old_fk = _foreign_keys(old, old_refs or _References({}))
+    new_fk = _foreign_keys(new, new_refs or _References({}))
+    common = [name for name in old_cols if name in new_cols]
+    reordered = common != [name for name in new_cols if name in old_cols]
+    return TableDiff(
+        new.fully_qualified_table, added, dropped, changed,
+        _primary_key(old), _primary_key(new),
+        sorted(new_fk - old_fk, key=str), sorted(old_fk - new_fk, key=str), reordered
+    )
+
+
+def _qualified(meta: TableMeta) -> str:
+    # dalle parti della TableMeta: un nome quotato puo' contenere un punto
+    return quote_qualified((meta.database, meta.schema_name, meta.table_name))
+
+
+def _qualified_ref(ref_table: str, target) -> str:
+    """Tabella referenziata: dalle parti della destinazione risolta nello snapshot, se presente."""
+    if target is not None:
+        return _qualified(target)
+    # non risolta: il riferimento e' disponibile solo come testo unito con "."
+    return ".".join(quote_ident(part) for part in ref_table.split("."))
+
+
+def _idents(names) -> str:
+    return ", ".join(quote_ident(name) for name in names)
+
+
+# tipi multi-parola con la lunghezza dopo una parola interna (TIMESTAMP(6) WITH TIME ZONE,
+# INTERVAL DAY(2) TO SECOND): numero di parole che la precedono. Negli altri
+# (CHARACTER VARYING(10), DOUBLE PRECISION) la lunghezza chiude il tipo.
+_LENGTH_AFTER = {"TIMESTAMP": 1, "TIME": 1, "INTERVAL": 2}
+
+
+def _type_sql(column) -> str:
+    if not column.length:
+        return column.datatype
+    words = column.datatype.split()
+    at = _LENGTH_AFTER.get(words[0].upper(), len(words)) if len(words) > 1 else 1
+    words[at - 1] += f"({column.length})"
+    return " ".join(words)
+
+
+def _create_sql(meta: TableMeta) -> list:
+    defs = [f"    {quote_ident(c.column_name)} {_type_sql(c)}" for c in meta.columns]
+    pk = _primary_key(meta)
+    if pk:
+        defs.append(f"    PRIMARY KEY ({_idents(pk)})")
+    return [f"CREATE TABLE {_qualified(meta)} (\n" + ",\n".join(defs) + "\n);"]
+
+
+def _alter_sql(diff: TableDiff, meta: TableMeta, refs: _References) -> list:
+    if diff.order_only:
+        return []
+    t = _qualified(meta)
+    out = []
+    # prima le FK e la PK rimosse, poi le colonne, infine le nuove constraint
+    for columns, _, _ in diff.dropped_foreign_keys:
+        out.append(f"ALTER TABLE {t} DROP FOREIGN KEY ({_idents(columns)});")
+    if diff.primary_key_changed and diff.old_primary_key:
+        out.append(f"ALTER TABLE {t} DROP PRIMARY KEY;")
+    for c in diff.dropped_columns:
+        out.append(f"ALTER TABLE {t} DROP COLUMN {quote_ident(c.column_name)};")
+    for c in diff.added_columns:
+        out.append(f"ALTER TABLE {t} ADD COLUMN {quote_ident(c.column_name)} {_type_sql(c)};")
+    for change in diff.changed_columns:
+        column = quote_ident(change.column_name)
+        out.append(f"ALTER TABLE {t} ALTER COLUMN {column} SET DATA TYPE {_type_sql(change.new)};")
+    if diff.primary_key_changed and diff.new_primary_key:
+        out.append(f"ALTER TABLE {t} ADD PRIMARY KEY ({_idents(diff.new_primary_key)});")
+    for columns, ref_table, ref_columns in diff.added_foreign_keys:
+        ref = f" ({_idents(ref_columns)})" if ref_columns else ""
+        ref_sql = _qualified_ref(ref_table, refs.target(ref_table, meta))
+        out.append(f"ALTER TABLE {t} ADD FOREIGN KEY ({_idents(columns)}) REFERENCES {ref_sql}{ref};")
+    return out
+
+
+def diff_catalogs(old, new, emit_alter: bool = False) -> SchemaDiff:
+    """
+    Confronta due cataloghi. old e new possono essere iterabili di
+    TableMeta/DDLInfo oppure snapshot gia' calcolati (dict di snapshot()).
+    """
+    old_snap = old if isinstance(old, dict) else snapshot(old)
+    new_snap = new if isinstance(new, dict) else snapshot(new)
+    old_refs = _References(old_snap)
+    new_refs = _References(new_snap)
+    added = []
+    changed = []
+    unchanged = 0
+    statements = []
+    for name, (fingerprint, meta) in new_snap.items():
+        previous = old_snap.get(name)
+        if previous is None:
+            added.append(meta)
+            if emit_alter:
+                statements.extend(_create_sql(meta))
+        elif previous[0] == fingerprint:
+            unchanged += 1
+        else:
+            table_diff = _diff_table(previous[1], meta, old_refs, new_refs)
+            changed.append(table_diff)
+            if emit_alter:
+                statements.extend(_alter_sql(table_diff, meta, new_refs))
+    dropped = [meta for name, (_, meta) in old_snap.items() if name not in new_snap]
+    if emit_alter:
+        statements.extend(f"DROP TABLE {_qualified(meta)};" for meta in dropped)
+    return SchemaDiff(added, dropped, changed, unchanged, statements)
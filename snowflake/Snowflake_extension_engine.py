@@ -1,73 +1,116 @@
 from parser_core.info_ddl_oop import DDLInfo
-from snowflake.snowflake_conf import SNOWFLAKE_TYPE_MAP as typemap
-from datetime import datetime
-from common_trx.transformations import (
-    build_reverse_typemap,
-    generate_additional_dtype_cols,
-    generate_additional_length_cols,
-    generate_additional_upper_cols,
-    get_elements,
-    count_df_elements)
-import os
+from parser_core.ddl_frames import build_catalog_dataframe
+from snowflake.snowflake_conf import SNOWFLAKE_TYPE_MAP as typemap, LENGTH_RULES
+from snowflake.type_mapping import compile_type_map
+from functools import cached_property
+from common_trx.pipeline import Stage, TransformPipeline, length_rules, map_types, present_length, upper
+from common_trx.transformations import get_elements, count_df_elements
 import logging
+import pandas as pd
 from mainconfig import config
+from mainconfig.log_setup import configure_logging, flush_debug_buffer
 
-log_dir = config.log_dir
-today = datetime.now().strftime("%Y%m%d")
 logger = logging.getLogger("Snowflake_extension")
-log_file = f"{log_dir}/{config.log_filename}_{today}.log"
-logger.setLevel(logging.DEBUG)
-os.makedirs(log_dir, exist_ok=True)
 
+# colonne Snowflake derivate in una sola pipeline: schema validato una volta, una scrittura per colonna
+SNOWFLAKE_PIPELINE = TransformPipeline("snowflake", (
+    Stage("type_mapping", ("datatype",), config.add_field_dtype, map_types),
+    Stage("length", ("length",), config.add_field_length, present_length),
+    Stage("upper", ("column_name",), config.add_field_upper, upper),
+    #ONLY FOR SNOWFLAKE DETERMINISTIC FIELDS
+    Stage("length_rules", (config.add_field_dtype, "length", config.add_field_length), config.add_field_length,
+          length_rules),
+))
 
 
+def snowflake_transform(df, source_db):
+    """
+    Trasformazioni Snowflake in place su un DataFrame con lo schema di
+    DDLInfo.to_dataframe(), che contenga una o molte tabelle.
+    """
+    # lookup compilata una volta per source_db e condivisa tra tutte le tabelle
+    reverse_typemap = compile_type_map(source_db).lookup
+    logger.debug("|snowflake_transform| , typemap per %s: %d tipi", source_db, len(reverse_typemap))
+    if not reverse_typemap:
+        logger.error("|snowflake_transform| reverse_typemap vuoto per %s", source_db)
+        raise ValueError("reverse_typemap non valido")
+    return SNOWFLAKE_PIPELINE.run(df, lookup=reverse_typemap, rules=LENGTH_RULES)
+
+
+def convert_catalog(tables, source_db):
+    """
+    Conversione Snowflake batch: tables e' un iterabile di TableMeta/DDLInfo
+    oppure un DataFrame gia' combinato (es. build_catalog_dataframe).
+    Mapping dei tipi e regole di lunghezza sono applicati una sola volta su
+    tutte le righe; le tabelle senza colonne sono ignorate.
+    """
+    df = tables if isinstance(tables, pd.DataFrame) else build_catalog_dataframe(tables)
+    if df.empty:
+        logger.error("|convert_catalog| , nessuna colonna da convertire")
+        raise ValueError("DataFrame vuoto: impossibile eseguire la conversione Snowflake")
+    return snowflake_transform(df, source_db)
+
 
 class SnowflakeExtend(DDLInfo):
+    """
+    Estensione Snowflake di DDLInfo. Il controllo fail-fast sulle colonne
+    avviene in costruzione; DataFrame e campi derivati sono calcolati al
+    primo accesso e memorizzati.
+    """
     def __init__(self,ddl, source_db):
         super().__init__(ddl)
-        logger.debug(f"|__init__| , estensione Snowflake avviata")
-        logger.info(f"|__init__| , prevelo il dataframe dalla classe info_ddl_oop")
-        self.dataframe_from_source = self.to_dataframe()
-        if self.dataframe_from_source.empty:
-            logger.error(f"|__init__| , dataframe non catturato da DDLinfo")
-            raise ValueError(
-                "DataFrame vuoto: impossibile inizializzare SnowflakeExtend"
-            )
-        logger.debug(f"|__init__| , dataframe catturato")
+        logger.debug("|__init__| , estensione Snowflake avviata")
+        self.source_db = source_db
         self.config_conversion_dict = typemap
-        reverse_typemap = build_reverse_typemap(typemap,source_system=source_db)
-        logger.debug(f"|__init__| , typemap : {reverse_typemap}")
-        self.conv_df = generate_additional_dtype_cols(self.dataframe_from_source,reverse_typemap)
-        logger.debug(f"|__init__| , aggiunta lunghezza per Snowflake")
-        self.dataframe_snw=generate_additional_length_cols(self.conv_df)
-        if self.dataframe_snw.empty:
+        if not self.count_element_ddl:
+            logger.error("|__init__| , dataframe non catturato da DDLinfo: %s", self.db_schema_table)
+            flush_debug_buffer("SnowflakeExtend: tabella senza colonne")
             raise ValueError(
-                "DataFrame dataframe_snw: impossibile proseguire con le trasformazioni Snowflake"
+                "DataFrame vuoto: impossibile inizializzare SnowflakeExtend"
             )
-        self.dataframe_snw=generate_additional_upper_cols(self.dataframe_snw)
-        #ONLY FOR SNOWFLAKE DETERMINISTIC FIELDS
-        self.dataframe_snw.loc[
-            self.dataframe_snw[config.add_field_dtype] == "TIMESTAMP_NTZ",
-            config.add_field_length
-        ] = 9
-        self.dataframe_snw.loc[
-            self.dataframe_snw[config.add_field_dtype] == "DATE",
-            config.add_field_length
-        ] = ''
-        self.dataframe_snw.loc[
-            (self.dataframe_snw[config.add_field_dtype] == "NUMBER") &
-            (self.dataframe_snw["length"] == 0),
-            config.add_field_length
-        ] = '38,0'
-        logger.debug(f"|__init__| , aggiunta lunghezza per Snowflake eseguita correttamente")
-        self.snowfieldlist = get_elements(self.dataframe_snw,"column_name")
-        self.snowfieldlist_upper = [
-            x.upper() for x in get_elements(self.dataframe_snw, "column_name")
-        ]
-        self.snowfields = ",".join(self.snowfieldlist_upper)
-        self.count_element_transformed = count_df_elements(self.dataframe_snw,self.snowfields)
+
+    @cached_property
+    def dataframe_snw(self):
+        logger.debug("|dataframe_snw| , prevelo il dataframe dalla classe info_ddl_oop")
+        dataframe_from_source = self.to_dataframe()
+        logger.debug("|dataframe_snw| , dataframe catturato")
+        dataframe_snw = snowflake_transform(dataframe_from_source, self.source_db)
+        logger.debug("|dataframe_snw| , aggiunta lunghezza per Snowflake eseguita correttamente")
+        return dataframe_snw
+
+    # le trasformazioni lavorano in place: sorgente, conversione e output sono lo stesso frame
+    @cached_property
+    def dataframe_from_source(self):
+        return self.dataframe_snw
+
+    @cached_property
+    def conv_df(self):
+        return self.dataframe_snw
+
+    @cached_property
+    def snowfieldlist(self) -> list:
+        return get_elements(self.dataframe_snw,"column_name")
+
+    @cached_property
+    def snowfieldlist_upper(self) -> list:
+        return [x.upper() for x in self.snowfieldlist]
+
+    @cached_property
+    def snowfields(self) -> str:
+        return ",".join(self.snowfieldlist_upper)
+
+    @cached_property
+    def count_element_transformed(self) -> int:
+        return count_df_elements(self.dataframe_snw,self.snowfields)
+
+    def to_arrow(self):
+        """Come DDLInfo.to_arrow, con le colonne di conversione Snowflake."""
+        from parser_core.ddl_arrow import SNOWFLAKE_FIELDS, to_arrow_table
+        df = self.dataframe_snw
+        return to_arrow_table([self.table_meta], {f: df[f].tolist() for f in SNOWFLAKE_FIELDS})
 
 if __name__ == "__main__":
+    configure_logging()
     ddl = """CREATE OR REPLACE TRANSIENT TABLE dbo.RENT.Clienti (
     ClienteID INT(11) NOT NULL,
     PROVA FLOAT(15,3),
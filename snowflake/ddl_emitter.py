@@ -0,0 +1,179 @@
+"""
+Sviluppatore: Antonio Nunziante
+Generazione delle DDL Snowflake per i layer L0 (staging, suffisso ST) e
+L1 (ODS, suffisso ODS).
+
+Le istruzioni vengono scritte in streaming su file o stream man mano che le
+tabelle sono convertite: SnowflakeDDLWriter accumula il testo in un buffer
+di dimensione fissa e lo scrive con un'unica chiamata write per blocco.
+La memoria dipende dal blocco di tabelle in conversione, non dal numero
+totale di tabelle emesse.
+"""
+
+import io
+import logging
+from itertools import islice
+
+from mainconfig import config
+from parser_core.ddl_idents import quote_ident
+from parser_core.ddl_records import COLUMN_FIELDS, TableMeta
+from snowflake.Snowflake_extension_engine import convert_catalog
+from snowflake.snowflake_conf import LENGTH_RULES, L1_rn_table_suffix, create_mode, l0_rn_table_suffix
+
+logger = logging.getLogger("Snowflake_extension")
+
+LAYER_SUFFIXES = (l0_rn_table_suffix, L1_rn_table_suffix)
+
+_CREATE_PREFIX = {
+    "replace": "CREATE OR REPLACE TABLE",
+    "if_not_exists": "CREATE TABLE IF NOT EXISTS",
+    "create": "CREATE TABLE",
+}
+# datatype Snowflake senza lunghezza (VARIANT, DATE, ...): regole con lunghezza vuota per ogni sorgente
+_NO_LENGTH = frozenset(dtype for dtype, (lengths, length) in LENGTH_RULES.items() if lengths is None and length == '')
+
+# posizioni nelle righe prodotte da convert_catalog / massive_ingest
+_ROW_FIELDS = COLUMN_FIELDS + (config.add_field_dtype, config.add_field_length, config.add_field_upper)
+_SOURCE_DTYPE, _IS_KEY, _DTYPE, _LENGTH, _UPPER = (
+    _ROW_FIELDS.index(f) for f in
+    ('datatype', 'is_key', config.add_field_dtype, config.add_field_length, config.add_field_upper)
+)
+
+
+def _ident(name: str) -> str:
+    # nomi in maiuscolo; tra "" quelli con spazi, trattini, ... e le parole riservate (ORDER, GROUP, ...)
+    return quote_ident(name.upper())
+
+
+def _missing(value) -> bool:
+    return value is None or value != value or value == ''
+
+
+def table_name(identity: tuple, suffix: str) -> str:
+    """Nome qualificato Snowflake della tabella di layer: DB.SCHEMA.TABELLA_SUFFISSO."""
+    _, database, schema_name, table = identity
+    parts = [p for p in (database, schema_name) if p]
+    parts.append(f"{table}_{suffix}" if suffix else table)
+    return ".".join(_ident(p) for p in parts)
+
+
+def render_create_table(identity: tuple, rows, suffix: str, mode: str = None) -> str:
+    """
+    CREATE TABLE Snowflake per una tabella. rows sono tuple con i campi di
+    COLUMN_FIELDS seguiti da add_dtype, add_length e upper_col_name.
+    I datatype non mappati mantengono il tipo sorgente.
+    """
+    mode = mode or create_mode
+    try:
+        prefix = _CREATE_PREFIX[mode]
+    except KeyError:
+        raise ValueError(f"create_mode non valido: {mode!r}") from None
+    defs = []
+    keys = []
+    for row in rows:
+        name = _ident(row[_UPPER])
+        dtype = row[_DTYPE]
+        if _missing(dtype):
+            dtype = row[_SOURCE_DTYPE].upper()
+            logger.warning("|render_create_table| datatype non mappato %s per %s.%s", dtype, identity[0], name)
+        length = row[_LENGTH]
+        if _missing(length) or dtype in _NO_LENGTH:
+            defs.append(f"    {name} {dtype}")
+        else:
+            defs.append(f"    {name} {dtype}({length})")
+        if row[_IS_KEY] == 'Y':
+            keys.append(name)
+    if keys:
+        defs.append(f"    PRIMARY KEY ({', '.join(keys)})")
+    return f"{prefix} {table_name(identity, suffix)} (\n" + ",\n".join(defs) + "\n);\n"
+
+
+class SnowflakeDDLWriter:
+    """
+    Scrittore bufferizzato di DDL Snowflake: per ogni tabella ricevuta scrive
+    una CREATE per ciascun layer. out e' un percorso o uno stream testuale.
+    """
+
+    def __init__(self, out, layers=LAYER_SUFFIXES, mode: str = None, buffer_bytes: int = 1 << 20):
+        self._own = isinstance(out, (str, bytes)) or hasattr(out, "__fspath__")
+        self._out = open(out, "w", encoding="utf-8", newline="\n") if self._own else out
+        self.layers = tuple(layers)
+        self.mode = mode or create_mode
+        self.buffer_bytes = buffer_bytes
+        self._buffer = []
+        self._buffered = 0
+        self.stats = {'tables': 0, 'statements': 0, 'chars': 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write_table(self, identity: tuple, rows):
+        rows = rows if isinstance(rows, (list, tuple)) else list(rows)
+        for suffix in self.layers:
+            text = render_create_table(identity, rows, suffix, self.mode)
+            self._buffer.append(text)
+            self._buffered += len(text)
+        self.stats['tables'] += 1
+        self.stats['statements'] += len(self.layers)
+        if self._buffered >= self.buffer_bytes:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            # unico punto di scrittura verso lo stream
+            self._out.write("".join(self._buffer))
+            self.stats['chars'] += self._buffered
+            self._buffer.clear()
+            self._buffered = 0
+
+    def close(self):
+        if self._out is None:
+            return
+        self.flush()
+        if self._own:
+            self._out.close()
+        else:
+            self._out.flush()
+        self._out = None
+
+
+def _converted_tables(metas: list, source_db: str):
+    """Conversione batch di un blocco di tabelle, restituita per tabella."""
+    df = convert_catalog(metas, source_db)
+    rows = list(df[list(_ROW_FIELDS)].itertuples(index=False, name=None))
+    start = 0
+    for meta in metas:
+        end = start + len(meta.columns)
+        yield meta.identity, rows[start:end]
+        start = end
+
+
+def write_snowflake_ddl(tables, out, source_db: str, layers=LAYER_SUFFIXES, mode: str = None,
+                        chunk_tables: int = 1000) -> dict:
+    """
+    Converte e scrive le DDL Snowflake di tutte le tabelle in input
+    (TableMeta, DDLInfo o SnowflakeExtend, anche da un generatore come
+    iter_tables) a blocchi di chunk_tables. Le tabelle senza colonne sono
+    saltate. Ritorna le statistiche dello scrittore.
+    """
+    metas = (t if isinstance(t, TableMeta) else t.table_meta for t in tables)
+    metas = (m for m in metas if m.columns)
+    with SnowflakeDDLWriter(out, layers, mode) as writer:
+        while True:
+            chunk = list(islice(metas, chunk_tables))
+            if not chunk:
+                break
+            for identity, rows in _converted_tables(chunk, source_db):
+                writer.write_table(identity, rows)
+    logger.info("|write_snowflake_ddl| %s", writer.stats)
+    return writer.stats
+
+
+def render_snowflake_ddl(tables, source_db: str, layers=LAYER_SUFFIXES, mode: str = None) -> str:
+    """Come write_snowflake_ddl ma ritorna il testo (per poche tabelle, es. FE)."""
+    out = io.StringIO()
+    write_snowflake_ddl(tables, out, source_db, layers, mode)
+    return out.getvalue()
@@ -26,7 +26,7 @@ SNOWFLAKE_TYPE_MAP = {
         "snowflake": ["NUMBER"]
     },
     "VARCHAR": {
-        "oracle": ['VARCHAR','CHAR','NVARCHAR','NVARCHAR2'],
+        "oracle": ['VARCHAR','VARCHAR2','CHAR','NVARCHAR','NVARCHAR2'],
         "sql_server": ['VARCHAR','CHAR','NVARCHAR','NVARCHAR2',"NCHAR","TEXT"],
         "snowflake": ['VARCHAR']
     },
@@ -41,6 +41,21 @@ AVAL_MAP_SNOW = {
         "snowflake":["oracle","sql_server","snowflake"]
     }
 
+# regole deterministiche sulla lunghezza Snowflake, applicate in ordine:
+# datatype Snowflake -> (lunghezze sorgente a cui si applica o None per tutte, lunghezza Snowflake)
+# lunghezza vuota per tutte le sorgenti: tipo Snowflake senza lunghezza
+LENGTH_RULES = {
+    "TIMESTAMP_NTZ": (None, 9),
+    "DATE": (None, ''),
+    "NUMBER": ((0,), '38,0'),
+    "VARIANT": (None, ''),
+    "BOOLEAN": (None, ''),
+    "OBJECT": (None, ''),
+    "ARRAY": (None, ''),
+    "GEOGRAPHY": (None, ''),
+    "GEOMETRY": (None, ''),
+}
+
 create_mode = "replace"
 l0_rn_table_suffix = "ST"
 L1_rn_table_suffix = "ODS"
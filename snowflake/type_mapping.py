@@ -0,0 +1,63 @@
+"""
+Sviluppatore: Antonio Nunziante
+Motore di mapping dei datatype precompilato.
+
+SNOWFLAKE_TYPE_MAP viene compilato una sola volta per coppia
+(sorgente, destinazione) in una lookup immutabile; il mapping di una
+colonna DataFrame avviene sui valori distinti (codici categorici) invece
+che riga per riga.
+"""
+
+from functools import lru_cache
+from types import MappingProxyType
+
+from common_trx.transformations import map_column_values, normalize_type_name
+from snowflake.snowflake_conf import SNOWFLAKE_TYPE_MAP
+
+
+class TypeMapper:
+    """Lookup immutabile datatype sorgente -> datatype destinazione."""
+
+    __slots__ = ("source_system", "target_system", "lookup")
+
+    def __init__(self, source_system: str, target_system: str, lookup: dict):
+        self.source_system = source_system
+        self.target_system = target_system
+        self.lookup = MappingProxyType(lookup)
+
+    def __repr__(self):
+        return f"TypeMapper({self.source_system!r} -> {self.target_system!r}, {len(self.lookup)} tipi)"
+
+    def map_type(self, datatype: str, default=None):
+        if not isinstance(datatype, str):
+            return default
+        return self.lookup.get(normalize_type_name(datatype), default)
+
+    def map_series(self, series, default=None):
+        return map_column_values(series, self.lookup, default)
+
+
+@lru_cache(maxsize=None)
+def compile_type_map(source_system: str, target_system: str = "snowflake") -> TypeMapper:
+    """
+    Compila SNOWFLAKE_TYPE_MAP per la coppia (sorgente, destinazione).
+    Con destinazione "snowflake" il tipo di arrivo e' la chiave della mappa;
+    verso un altro sistema si passa dal tipo Snowflake e si prende il primo
+    tipo elencato per quel sistema.
+    """
+    source_system = source_system.lower()
+    target_system = target_system.lower()
+    lookup = {}
+    for snowflake_type, systems in SNOWFLAKE_TYPE_MAP.items():
+        if source_system not in systems:
+            continue
+        if target_system == "snowflake":
+            target_type = snowflake_type
+        elif systems.get(target_system):
+            target_type = systems[target_system][0]
+        else:
+            continue
+        for src_type in systems[source_system]:
+            # a parita' di tipo sorgente vale la prima voce della mappa
+            lookup.setdefault(normalize_type_name(src_type), target_type)
+    return TypeMapper(source_system, target_system, lookup)